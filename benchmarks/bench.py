@@ -0,0 +1,327 @@
+"""Throughput benchmarks for URL encoding and signing.
+
+    python -m benchmarks.bench                    # run and print ops/s
+    python -m benchmarks.bench --against master   # fail on regressions vs a git ref
+    python -m benchmarks.bench --save             # store results as the baseline
+    python -m benchmarks.bench --compare          # compare with the stored baseline
+
+`--against` is the regression gate: the working tree and the reference build
+run in two worker processes and every case is measured on both sides in
+alternating rounds, so machine noise hits both alike. The median ratio over
+the rounds is compared with the threshold.
+
+`--compare` normalizes results against a pure-Python calibration loop so a
+baseline recorded on one machine stays meaningful on another, but it is only
+as stable as the machine: use it to track trends, not to gate. Only the
+standard library, git and the package itself are needed.
+"""
+from argparse import SUPPRESS, ArgumentParser
+from io import BytesIO
+from json import dump, dumps, load, loads
+from os import environ, path
+from statistics import median
+from subprocess import PIPE, Popen, check_output
+from tempfile import TemporaryDirectory
+from timeit import Timer
+import sys
+import tarfile
+import warnings
+
+import flyyer as package
+from flyyer import Flyyer, FlyyerMeta, FlyyerRender, to_query
+
+ROOT = path.dirname(path.dirname(path.abspath(__file__)))
+BASELINE = path.join(ROOT, "benchmarks", "baseline.json")
+KEY = "sg1j0HVy9bsMihJqa8Qwu8ZYgCYHG0tx"
+BATCH = 1000
+
+FLAT = {"title": "Hello world!", "description": "Jeans & shirts", "price": 1999, "sale": True}
+NESTED = {
+    "title": "Hello world!",
+    "crumbs": [{"name": name, "url": f"/{name.lower()}"} for name in ["Home", "Shop", "Jeans"]],
+    "tiers": [{"min": i, "price": i * 1.5, "active": i % 2 == 0} for i in range(10)],
+    "seller": {"name": "Ñandú store", "rating": {"value": 4.5, "count": 120}},
+}
+META = FlyyerMeta(id="jeans-123", width=1200, height=630, v="1")
+STRATEGIES = {"none": (None, None), "hmac": ("HMAC", KEY), "jwt": ("JWT", KEY)}
+
+
+def _flyyer(name, variables):
+    strategy, secret = STRATEGIES[name]
+    return Flyyer(
+        project="project",
+        path="/products/jeans",
+        secret=secret,
+        strategy=strategy,
+        variables=variables,
+        meta=META,
+        default="/static/jeans.png",
+    )
+
+
+def _render(name, variables):
+    strategy, secret = STRATEGIES[name]
+    return FlyyerRender(
+        tenant="tenant",
+        deck="deck",
+        template="template",
+        extension="jpeg",
+        secret=secret,
+        strategy=strategy,
+        variables=variables,
+        meta=META,
+    )
+
+
+def _cases():
+    # name -> (callable, operations per call). Cases for features missing from
+    # the imported package are left out, so older builds can be measured.
+    cases = {
+        "to_query.flat": (lambda: to_query(FLAT), 1),
+        "to_query.nested": (lambda: to_query(NESTED), 1),
+    }
+    for shape, variables in [("flat", FLAT), ("nested", NESTED)]:
+        flyyer = _flyyer("none", variables)
+        cases[f"flyyer.querystring.{shape}"] = (flyyer.querystring, 1)
+        for name in STRATEGIES:
+            flyyer = _flyyer(name, variables)
+            render = _render(name, variables)
+            cases[f"flyyer.href.{name}.{shape}"] = (flyyer.href, 1)
+            cases[f"render.href.{name}.{shape}"] = (render.href, 1)
+            if name != "none":
+                cases[f"flyyer.sign.{name}.{shape}"] = (flyyer.sign, 1)
+    for shape, variables in [("flat", FLAT), ("nested", NESTED)]:
+        if not hasattr(Flyyer, "from_href"):
+            break
+        for name in STRATEGIES:
+            href = _flyyer(name, variables).href()
+            cases[f"flyyer.from_href.{name}.{shape}"] = (lambda h=href: Flyyer.from_href(h, KEY), 1)
+            href = _render(name, variables).href()
+            cases[f"render.from_href.{name}.{shape}"] = (lambda h=href: FlyyerRender.from_href(h, KEY), 1)
+    for name in STRATEGIES:
+        if not hasattr(Flyyer, "href_many"):
+            break
+        pages = [(f"/products/{i}", {**FLAT, "title": f"Product {i}"}) for i in range(BATCH)]
+        flyyer = _flyyer(name, None)
+        render = _render(name, None)
+        cases[f"flyyer.href_many.{name}"] = (lambda f=flyyer: f.href_many(pages), BATCH)
+        variables = [page[1] for page in pages]
+        cases[f"render.href_many.{name}"] = (lambda r=render: r.href_many(variables), BATCH)
+    values = {"title": "Product 1"}
+    for name in STRATEGIES:
+        if hasattr(package, "FlyyerTemplate"):
+            template = package.FlyyerTemplate(_flyyer(name, FLAT), ["title"])
+            cases[f"flyyer.template.{name}"] = (lambda t=template: t.href(values), 1)
+            template = package.FlyyerRenderTemplate(_render(name, FLAT), ["title"])
+            cases[f"render.template.{name}"] = (lambda t=template: t.href(values), 1)
+        if hasattr(package, "LayeredFlyyer"):
+            layered = package.LayeredFlyyer(_flyyer(name, NESTED))
+            cases[f"flyyer.layered.{name}"] = (lambda l=layered: l.href(values), 1)
+    return cases
+
+
+def _calibration():
+    # Dict, string and int work similar to the encoder, without touching it.
+    parts = []
+    for key, value in {"a": 1, "bb": "two", "ccc": 3.0, "dddd": None}.items():
+        parts.append("{}[{}]={}".format(key, len(parts), value))
+    return "&".join(sorted(parts))
+
+
+def measure(fn, ops, min_time=0.2, repeat=5) -> float:
+    timer = Timer(fn)
+    number, _ = timer.autorange()
+    number = max(1, int(number * min_time / 0.2))
+    best = min(timer.repeat(repeat=repeat, number=number))
+    return number * ops / best
+
+
+def run(selected=None, min_time=0.2, repeat=5):
+    results = {}
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        for name, (fn, ops) in sorted(_cases().items()):
+            if selected and not any(s in name for s in selected):
+                continue
+            results[name] = measure(fn, ops, min_time=min_time, repeat=repeat)
+    # Calibrate before and after the run and keep the best, warm-up and
+    # frequency scaling otherwise skew the first measurement.
+    calibration = [measure(_calibration, 1, min_time=min_time, repeat=repeat) for _ in range(2)]
+    results["calibration"] = max(calibration + [results.pop("calibration", 0)])
+    return results
+
+
+def _worker():
+    # `--worker` protocol: prints the case names, then answers each
+    # `[name, min_time]` line with the ops/s of one timed run of that case.
+    cases = _cases()
+    numbers = {}
+    print(dumps(sorted(cases)), flush=True)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        for line in sys.stdin:
+            name, min_time = loads(line)
+            fn, ops = cases[name]
+            timer = Timer(fn)
+            if name not in numbers:
+                number, _ = timer.autorange()
+                numbers[name] = max(1, int(number * min_time / 0.2))
+            number = numbers[name]
+            print(dumps(number * ops / min(timer.repeat(repeat=3, number=number))), flush=True)
+
+
+class _Side:
+    # A worker process importing `flyyer` from `root`.
+    def __init__(self, root):
+        self.root = root
+        env = dict(environ, PYTHONPATH=root, PYTHONHASHSEED="0")
+        self.process = Popen(
+            [sys.executable, path.abspath(__file__), "--worker"],
+            stdin=PIPE,
+            stdout=PIPE,
+            env=env,
+            universal_newlines=True,
+        )
+        self.cases = set(self._read())
+
+    def _read(self):
+        line = self.process.stdout.readline()
+        if not line:
+            code = self.process.wait()
+            raise Exception(f"Benchmark worker for `{self.root}` exited with code {code}, see its error above.")
+        return loads(line)
+
+    def measure(self, name, min_time):
+        try:
+            self.process.stdin.write(dumps([name, min_time]) + "\n")
+            self.process.stdin.flush()
+        except BrokenPipeError:
+            pass  # reported by `_read()`
+        return self._read()
+
+    def close(self):
+        try:
+            self.process.stdin.close()
+        except BrokenPipeError:
+            pass
+        self.process.wait()
+
+
+def _checkout(ref, target):
+    # Extracts the `flyyer` package of a git ref (or copies nothing if `ref`
+    # is already a directory holding one) and returns its root.
+    if path.isdir(path.join(ref, "flyyer")):
+        return ref
+    data = check_output(["git", "archive", "--format=tar", ref, "flyyer"], cwd=ROOT)
+    with tarfile.open(fileobj=BytesIO(data)) as archive:
+        archive.extractall(target)
+    return target
+
+
+def ab(reference, selected=None, rounds=7, min_time=0.05):
+    # Returns `{name: (ops, reference_ops, median ratio)}` for the cases both
+    # sides have. Each round swaps which side runs first.
+    results = {}
+    with TemporaryDirectory() as target:
+        current = _Side(ROOT)
+        try:
+            other = _Side(_checkout(reference, target))
+            try:
+                for name in sorted(current.cases & other.cases):
+                    if selected and not any(s in name for s in selected):
+                        continue
+                    ratios, ops, reference_ops = [], [], []
+                    for index in range(rounds):
+                        if index % 2:
+                            theirs = other.measure(name, min_time)
+                            ours = current.measure(name, min_time)
+                        else:
+                            ours = current.measure(name, min_time)
+                            theirs = other.measure(name, min_time)
+                        ratios.append(ours / theirs)
+                        ops.append(ours)
+                        reference_ops.append(theirs)
+                    results[name] = (median(ops), median(reference_ops), median(ratios))
+            finally:
+                other.close()
+        finally:
+            current.close()
+    return results
+
+
+def compare_ab(results, threshold):
+    # Returns the names whose median ratio to the reference dropped more than `threshold`.
+    regressions = []
+    for name, (ops, reference_ops, ratio) in sorted(results.items()):
+        change = ratio - 1
+        flag = ""
+        if change < -threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:36} {ops:14,.0f} ops/s vs {reference_ops:14,.0f} {change:+8.1%}{flag}")
+    return regressions
+
+
+def compare(results, baseline, threshold):
+    # Returns the names whose normalized throughput dropped more than `threshold`.
+    scale = results["calibration"] / baseline["calibration"]
+    regressions = []
+    for name, ops in sorted(results.items()):
+        if name == "calibration" or name not in baseline:
+            continue
+        expected = baseline[name] * scale
+        change = ops / expected - 1
+        flag = ""
+        if change < -threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:36} {ops:14,.0f} ops/s {change:+8.1%}{flag}")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = ArgumentParser(prog="python -m benchmarks.bench")
+    parser.add_argument("filter", nargs="*", help="only run benchmarks containing these names")
+    parser.add_argument("--save", action="store_true", help=f"write results to {BASELINE}")
+    parser.add_argument("--compare", action="store_true", help="compare against the baseline")
+    parser.add_argument("--against", metavar="REF", help="A/B against a git ref or a source tree")
+    parser.add_argument("--rounds", type=int, default=7, help="A/B rounds per case")
+    parser.add_argument("--worker", action="store_true", help=SUPPRESS)
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown, 0.25 = 25%%")
+    parser.add_argument("--min-time", type=float, help="seconds per measurement, 0.2 (0.05 per A/B run)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        _worker()
+        return 0
+    if args.against:
+        regressions = compare_ab(
+            ab(args.against, args.filter, rounds=args.rounds, min_time=args.min_time or 0.05),
+            args.threshold,
+        )
+        if regressions:
+            print(f"{len(regressions)} benchmark(s) regressed more than {args.threshold:.0%}", file=sys.stderr)
+            return 1
+        return 0
+    results = run(args.filter, min_time=args.min_time or 0.2, repeat=args.repeat)
+    if args.compare:
+        with open(args.baseline) as f:
+            baseline = load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} benchmark(s) regressed more than {args.threshold:.0%}", file=sys.stderr)
+            return 1
+        return 0
+    for name, ops in sorted(results.items()):
+        print(f"{name:36} {ops:14,.0f} ops/s")
+    if args.save:
+        with open(args.baseline, "w") as f:
+            dump({name: round(ops, 1) for name, ops in results.items()}, f, indent=2, sort_keys=True)
+            f.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
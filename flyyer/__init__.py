@@ -1,3 +1,18 @@
 __version__ = "1.0.0"
 
-from flyyer.flyyer import Flyyer, FlyyerMeta, to_query, FlyyerRender
+from flyyer.flyyer import (
+    Flyyer,
+    FlyyerMeta,
+    to_query,
+    FlyyerRender,
+    PreparedFlyyer,
+    PreparedFlyyerRender,
+    from_hrefs,
+)
+from flyyer.signer import HMACSigner, JWTSigner, UnsignedSigner, hmac_signer, jwt_signer, resolve_signer
+from flyyer.cache import HrefCache, SQLiteHrefCache, CacheInfo, fingerprint
+from flyyer.clock import FlyyerClock
+from flyyer.stats import FlyyerStats
+from flyyer.verify import FlyyerVerifier, verify_href
+from flyyer.template import FlyyerTemplate, FlyyerRenderTemplate, LayeredFlyyer, compile_template
+from flyyer.tags import FlyyerMetaTags, meta_tags
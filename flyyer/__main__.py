@@ -0,0 +1,5 @@
+import sys
+
+from flyyer.cli import main
+
+sys.exit(main())
@@ -0,0 +1,53 @@
+import asyncio
+from concurrent.futures import Executor
+from time import perf_counter
+from typing import Any, Iterable, List, Optional, Union
+
+from flyyer.flyyer import (
+    Flyyer,
+    FlyyerRender,
+    PreparedFlyyer,
+    PreparedFlyyerRender,
+    _href_many,
+)
+from flyyer.stream import iter_chunks
+
+Builder = Union[Flyyer, FlyyerRender, PreparedFlyyer, PreparedFlyyerRender]
+
+
+async def ahref_many(
+    builder: Builder,
+    items: Iterable[Any],
+    slice_time: float = 0.005,
+    executor: Optional[Executor] = None,
+    chunk_size: int = 256,
+    concurrency: int = 4,
+) -> List[str]:
+    # Same as `builder.href_many(items)` without blocking the event loop.
+    # Inline, work yields to the loop every `slice_time` seconds. With an
+    # `executor` (threads or processes, usually shared by the app), items are
+    # sent in chunks of `chunk_size` with at most `concurrency` chunks of this
+    # batch in flight; inline there is a single chunk in flight. Results keep
+    # the order of `items`.
+    if concurrency < 1:
+        raise Exception("Invalid `concurrency`. It must be at least 1.")
+    prepared = builder.prepare() if isinstance(builder, (Flyyer, FlyyerRender)) else builder
+    if executor is None:
+        results = []
+        deadline = perf_counter() + slice_time
+        for chunk in iter_chunks(items, 16):
+            results.extend(_href_many(prepared, chunk))
+            if perf_counter() >= deadline:
+                await asyncio.sleep(0)
+                deadline = perf_counter() + slice_time
+        return results
+
+    loop = asyncio.get_event_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(chunk: List[Any]) -> List[str]:
+        async with semaphore:
+            return await loop.run_in_executor(executor, _href_many, prepared, chunk)
+
+    chunks = await asyncio.gather(*[run(chunk) for chunk in iter_chunks(items, chunk_size)])
+    return [href for chunk in chunks for href in chunk]
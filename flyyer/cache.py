@@ -0,0 +1,269 @@
+from collections import OrderedDict, namedtuple
+from hashlib import sha256
+from json import dumps
+from os import getpid
+from threading import Lock
+from time import time
+from typing import Any, Callable, Mapping, Optional, Union
+
+from flyyer.flyyer import Flyyer, FlyyerRender, PreparedFlyyer, PreparedFlyyerRender
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "evictions", "size", "maxsize"])
+
+Builder = Union[Flyyer, FlyyerRender, PreparedFlyyer, PreparedFlyyerRender]
+
+
+def _strategy_key(strategy: Any) -> Optional[str]:
+    # Signer instances are identified by their `cache_key`, never by `repr()`:
+    # memory addresses differ across processes and get reused within one.
+    if strategy is None or isinstance(strategy, str):
+        return strategy
+    key = getattr(strategy, "cache_key", None)
+    if not isinstance(key, str):
+        raise Exception("Invalid `strategy`. Signers must set a `cache_key` string to be cached.")
+    return key
+
+
+def _tagged(value: Any) -> Any:
+    # JSON form of `value` tagged with types, so values that `to_query` keeps
+    # apart (`True` and `"true"`, `1` and `"1"`, keys of any type) never share it.
+    if isinstance(value, Mapping):
+        return ["map", [[_tagged(key), _tagged(item)] for key, item in value.items()]]
+    if isinstance(value, (list, tuple)):
+        return [type(value).__name__, [_tagged(item) for item in value]]
+    return [type(value).__name__, str(value)]
+
+
+def fingerprint(flyyer: Builder) -> str:
+    # Variables keep their insertion order: it is part of FlyyerRender's signed data.
+    # The clock bucket is part of the key: it decides `__v` when it is not pinned.
+    if isinstance(flyyer, (FlyyerRender, PreparedFlyyerRender)):
+        fields = [
+            "render",
+            flyyer.tenant,
+            flyyer.deck,
+            flyyer.template,
+            flyyer.version,
+            flyyer.extension,
+            flyyer.secret,
+            _strategy_key(flyyer.strategy),
+            flyyer.variables,
+            flyyer.meta,
+            flyyer.clock.bucket,
+        ]
+    elif isinstance(flyyer, (Flyyer, PreparedFlyyer)):
+        fields = [
+            "flyyer",
+            flyyer.project,
+            flyyer.path,
+            flyyer.secret,
+            _strategy_key(flyyer.strategy),
+            flyyer.variables,
+            flyyer.meta,
+            flyyer.default,
+            flyyer.clock.bucket,
+        ]
+    else:
+        raise Exception(
+            "Invalid `flyyer`. Expected a Flyyer, FlyyerRender or one of their prepared versions."
+        )
+    payload = dumps(_tagged(fields), separators=(",", ":"))
+    return sha256(payload.encode("utf-8")).hexdigest()
+
+
+class HrefCache:
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: Optional[float] = 60,
+        timer: Callable[[], float] = time,
+    ):
+        # `ttl` only applies to hrefs whose `__v` comes from the clock: when
+        # `meta["v"]` is set the href never changes and lives until evicted.
+        # With `ttl=None` those hrefs live as long as the clock keeps returning
+        # the same `__v`, see `FlyyerClock(bucket=...)`.
+        if maxsize <= 0:
+            raise Exception("Invalid `maxsize`. It must be a positive integer.")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.timer = timer
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def href(self, flyyer: Builder) -> str:
+        key = fingerprint(flyyer)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                href, expires, v = entry
+                if v is not None:
+                    fresh = v == flyyer.clock.v()
+                else:
+                    fresh = expires is None or self.timer() < expires
+                if fresh:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return href
+                del self._entries[key]
+            self.misses += 1
+        expires = v = None
+        if "v" not in flyyer.meta:
+            if self.ttl is None:
+                v = flyyer.clock.v()
+            else:
+                expires = self.timer() + self.ttl
+        href = flyyer.href()
+        with self._lock:
+            self._entries[key] = (href, expires, v)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return href
+
+    def info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(
+                self.hits, self.misses, self.evictions, len(self._entries), self.maxsize
+            )
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteHrefCache:
+    # `HrefCache` stored in a SQLite file, shared by every process on the
+    # machine (e.g. gunicorn workers) and kept across restarts. Each process
+    # opens its own connection; hits, misses and evictions are per process.
+    # Expiry works as in `HrefCache`, with wall-clock `timer` times so entries
+    # stay valid across processes. Evicts the oldest entries past `maxsize`.
+    def __init__(
+        self,
+        path: str,
+        maxsize: int = 100000,
+        ttl: Optional[float] = 60,
+        timer: Callable[[], float] = time,
+        timeout: float = 5.0,
+    ):
+        if maxsize <= 0:
+            raise Exception("Invalid `maxsize`. It must be a positive integer.")
+        self.path = path
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.timer = timer
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = Lock()
+        self._connection = None
+        self._pid = None
+
+    def _connect(self):
+        # Connections must not cross a fork, workers reopen the file.
+        if self._connection is None or self._pid != getpid():
+            import sqlite3  # only loaded by apps using this cache
+
+            connection = sqlite3.connect(
+                self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            # `hrefs_size` keeps the row count so eviction never scans the table.
+            connection.execute("BEGIN IMMEDIATE")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS hrefs"
+                " (key TEXT PRIMARY KEY, href TEXT NOT NULL, expires REAL, v TEXT)"
+            )
+            connection.execute("CREATE TABLE IF NOT EXISTS hrefs_size (n INTEGER NOT NULL)")
+            connection.execute(
+                "INSERT INTO hrefs_size (n) SELECT COUNT(*) FROM hrefs"
+                " WHERE NOT EXISTS (SELECT 1 FROM hrefs_size)"
+            )
+            connection.execute(
+                "CREATE TRIGGER IF NOT EXISTS hrefs_insert AFTER INSERT ON hrefs"
+                " BEGIN UPDATE hrefs_size SET n = n + 1; END"
+            )
+            connection.execute(
+                "CREATE TRIGGER IF NOT EXISTS hrefs_delete AFTER DELETE ON hrefs"
+                " BEGIN UPDATE hrefs_size SET n = n - 1; END"
+            )
+            connection.execute("COMMIT")
+            self._connection = connection
+            self._pid = getpid()
+        return self._connection
+
+    def href(self, flyyer: Builder) -> str:
+        key = fingerprint(flyyer)
+        with self._lock:
+            connection = self._connect()
+            row = connection.execute(
+                "SELECT href, expires, v FROM hrefs WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                href, expires, v = row
+                if v is not None:
+                    fresh = v == flyyer.clock.v()
+                else:
+                    fresh = expires is None or self.timer() < expires
+                if fresh:
+                    self.hits += 1
+                    return href
+            self.misses += 1
+        expires = v = None
+        if "v" not in flyyer.meta:
+            if self.ttl is None:
+                v = flyyer.clock.v()
+            else:
+                expires = self.timer() + self.ttl
+        href = flyyer.href()
+        with self._lock:
+            connection = self._connect()
+            # Delete and insert instead of `INSERT OR REPLACE`, which skips the
+            # delete trigger. A rewritten row gets a new rowid, so the lowest
+            # rowids are the least recently written entries.
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.execute("DELETE FROM hrefs WHERE key = ?", (key,))
+                connection.execute(
+                    "INSERT INTO hrefs (key, href, expires, v) VALUES (?, ?, ?, ?)",
+                    (key, href, expires, v),
+                )
+                size = connection.execute("SELECT n FROM hrefs_size").fetchone()[0]
+                if size > self.maxsize:
+                    self.evictions += connection.execute(
+                        "DELETE FROM hrefs WHERE rowid IN"
+                        " (SELECT rowid FROM hrefs ORDER BY rowid LIMIT ?)",
+                        (size - self.maxsize,),
+                    ).rowcount
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+        return href
+
+    def info(self) -> CacheInfo:
+        return CacheInfo(self.hits, self.misses, self.evictions, len(self), self.maxsize)
+
+    def clear(self):
+        with self._lock:
+            self._connect().execute("DELETE FROM hrefs")
+            self.hits = self.misses = self.evictions = 0
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None and self._pid == getpid():
+                self._connection.close()
+            self._connection = None
+
+    def __len__(self):
+        with self._lock:
+            return self._connect().execute("SELECT n FROM hrefs_size").fetchone()[0]
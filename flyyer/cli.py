@@ -0,0 +1,155 @@
+from argparse import ArgumentParser
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from csv import DictReader
+from itertools import islice
+from json import loads
+from os import cpu_count, environ
+from time import perf_counter
+from typing import Any, Iterable, Iterator, List, Mapping, Optional
+import sys
+
+from flyyer.flyyer import Flyyer, FlyyerRender
+from flyyer.stream import iter_chunks
+
+
+def _parse_record(record: Any) -> Mapping[str, Any]:
+    # JSONL records arrive as raw lines so parsing happens on the workers.
+    if isinstance(record, str):
+        return loads(record)
+    # CSV cells are strings: `variables` and `meta` hold JSON objects. An empty
+    # `default` cell is left out so `--default` applies.
+    parsed = {
+        "path": record.get("path") or "/",
+        "variables": loads(record["variables"]) if record.get("variables") else None,
+        "meta": loads(record["meta"]) if record.get("meta") else None,
+    }
+    if record.get("default"):
+        parsed["default"] = record["default"]
+    return parsed
+
+
+def _href(config: Mapping[str, Any], record: Any) -> str:
+    record = _parse_record(record)
+    if config.get("project"):
+        return Flyyer(
+            project=config["project"],
+            path=record.get("path") or "/",
+            secret=config.get("secret"),
+            strategy=config.get("strategy"),
+            variables=record.get("variables"),
+            meta=record.get("meta"),
+            default=record.get("default", config.get("default")),
+        ).href()
+    return FlyyerRender(
+        tenant=config["tenant"],
+        deck=config["deck"],
+        template=config["template"],
+        version=config.get("version"),
+        extension=config.get("extension"),
+        variables=record.get("variables"),
+        meta=record.get("meta"),
+        secret=config.get("secret"),
+        strategy=config.get("strategy"),
+    ).href()
+
+
+def _href_chunk(config: Mapping[str, Any], records: List[Any]) -> str:
+    return "".join(_href(config, record) + "\n" for record in records)
+
+
+def _read_records(stream, fmt: str) -> Iterator[Any]:
+    if fmt == "csv":
+        return iter(DictReader(stream))
+    return (line for line in stream if line.strip())
+
+
+def run(
+    config: Mapping[str, Any],
+    records: Iterable[Any],
+    output,
+    workers: int = 1,
+    chunk_size: int = 1000,
+    max_pending: Optional[int] = None,
+) -> int:
+    # Chunks are dispatched in order and at most `max_pending` of them are in
+    # flight, so memory stays bounded no matter how large the input is.
+    count = 0
+    if workers <= 1:
+        for chunk in iter_chunks(records, chunk_size):
+            output.write(_href_chunk(config, chunk))
+            count += len(chunk)
+        return count
+    max_pending = max_pending if max_pending else workers * 2
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for chunk in iter_chunks(records, chunk_size):
+            if len(pending) >= max_pending:
+                output.write(pending.popleft().result())
+            pending.append(executor.submit(_href_chunk, config, chunk))
+            count += len(chunk)
+        while pending:
+            output.write(pending.popleft().result())
+    return count
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = ArgumentParser(
+        prog="python -m flyyer",
+        description="Generate Flyyer URLs for JSONL or CSV records, one URL per line in input order.",
+    )
+    parser.add_argument("input", nargs="?", default="-", help="input file, `-` for stdin")
+    parser.add_argument("-o", "--output", default="-", help="output file, `-` for stdout")
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="defaults to the input extension or jsonl")
+    parser.add_argument("--project", help="Flyyer project slug")
+    parser.add_argument("--default", help="default image for Flyyer records")
+    parser.add_argument("--tenant", help="FlyyerRender tenant")
+    parser.add_argument("--deck", help="FlyyerRender deck")
+    parser.add_argument("--template", help="FlyyerRender template")
+    parser.add_argument("--version", help="FlyyerRender template version")
+    parser.add_argument("--extension", help="FlyyerRender image extension")
+    parser.add_argument("--strategy", help="`HMAC` or `JWT`")
+    parser.add_argument("--secret", help="defaults to the FLYYER_SECRET environment variable")
+    parser.add_argument("-j", "--workers", type=int, default=cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--max-pending", type=int, help="chunks in flight, defaults to 2 per worker")
+    parser.add_argument("--offset", type=int, default=0, help="skip this many records, to resume a run")
+    args = parser.parse_args(argv)
+
+    if not args.project and not (args.tenant and args.deck and args.template):
+        parser.error("either --project or --tenant, --deck and --template are required")
+    config = {
+        "project": args.project,
+        "default": args.default,
+        "tenant": args.tenant,
+        "deck": args.deck,
+        "template": args.template,
+        "version": args.version,
+        "extension": args.extension,
+        "strategy": args.strategy,
+        "secret": args.secret or (environ.get("FLYYER_SECRET") if args.strategy else None),
+    }
+    fmt = args.format or ("csv" if args.input.endswith(".csv") else "jsonl")
+
+    source = sys.stdin if args.input == "-" else open(args.input, newline="", encoding="utf-8")
+    mode = "a" if args.offset else "w"
+    output = sys.stdout if args.output == "-" else open(args.output, mode, encoding="utf-8")
+    start = perf_counter()
+    try:
+        count = run(
+            config,
+            islice(_read_records(source, fmt), args.offset, None),
+            output,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            max_pending=args.max_pending,
+        )
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+    elapsed = perf_counter() - start
+    rate = count / elapsed if elapsed else 0
+    print(f"{count} URLs in {elapsed:.2f}s ({rate:.0f} URLs/s)", file=sys.stderr)
+    return 0
@@ -0,0 +1,30 @@
+from time import time
+from typing import Callable
+
+
+class FlyyerClock:
+    # Source of `__v` when `meta["v"]` is not set. Every `bucket` seconds share
+    # the same value, so identical pages produce identical URLs within a window.
+    __slots__ = ("bucket", "now", "_cached")
+
+    def __init__(self, bucket: int = 1, now: Callable[[], float] = time):
+        if int(bucket) < 1:
+            raise Exception("Invalid `bucket`. It must be at least 1 second.")
+        self.bucket = int(bucket)
+        self.now = now
+        self._cached = (None, "")
+
+    def window(self) -> int:
+        return int(self.now()) // self.bucket
+
+    def v(self) -> str:
+        window = self.window()
+        cached = self._cached  # single read: safe if another thread refreshes it
+        if cached[0] == window:
+            return cached[1]
+        value = str(window * self.bucket)
+        self._cached = (window, value)
+        return value
+
+
+DEFAULT_CLOCK = FlyyerClock()
@@ -1,19 +1,57 @@
-from time import time
-from urllib.parse import urlencode
-from typing import Optional, Mapping, Union, Any
-from typing_extensions import TypedDict
-from hashlib import sha256
-import hmac
-import jwt
+from base64 import urlsafe_b64decode
+from bisect import insort
+from functools import lru_cache
+from json import loads
+from re import compile as re_compile
+from typing import TYPE_CHECKING, Optional, Mapping, Union, Any, Iterable, Iterator, List, Tuple
+from urllib.parse import urlsplit
+import pickle
+import sys
 
+from flyyer.clock import FlyyerClock, DEFAULT_CLOCK
+from flyyer.query import decode_pairs, encode_pairs, sort_pairs, sorted_query
+from flyyer.signer import resolve_signer
 
-class FlyyerMeta(TypedDict, total=False):
-    agent: str
-    width: Union[str, int]
-    height: Union[str, int]
-    resolution: Union[str, int]
-    id: Union[str, int]
-    v: Union[str, int]
+
+if TYPE_CHECKING or sys.version_info >= (3, 8):
+    try:
+        from typing import TypedDict
+    except ImportError:  # Python < 3.8
+        from typing_extensions import TypedDict
+
+    class FlyyerMeta(TypedDict, total=False):
+        agent: str
+        width: Union[str, int]
+        height: Union[str, int]
+        resolution: Union[str, int]
+        id: Union[str, int]
+        v: Union[str, int]
+
+else:
+
+    class FlyyerMeta(dict):
+        # Python < 3.8 at runtime: a plain dict, so importing flyyer does not
+        # load `typing_extensions`. Type checkers see the TypedDict above.
+        pass
+
+
+def _signer_option(name: str) -> property:
+    # `strategy` and `secret` are resolved to `signer` at init. Setting either
+    # resolves it again (and validates the pair) on the next href.
+    attribute = "_" + name
+
+    def set_option(self, value):
+        setattr(self, attribute, value)
+        self._signer = None
+
+    return property(lambda self: getattr(self, attribute), set_option)
+
+
+def _signer(self):
+    signer = self._signer
+    if signer is None:
+        signer = self._signer = resolve_signer(self._strategy, self._secret)
+    return signer
 
 
 class FlyyerRender:
@@ -28,6 +66,7 @@ class FlyyerRender:
         meta: Optional[FlyyerMeta] = None,
         secret: Optional[str] = None,
         strategy: Optional[str] = None,
+        clock: Optional[FlyyerClock] = None,
     ):
         self.tenant = tenant
         self.deck = deck
@@ -36,23 +75,20 @@ class FlyyerRender:
         self.extension = extension
         self.variables = variables if variables else {}
         self.meta = meta if meta else {}
-        self.secret = secret
-        self.strategy = strategy
-        if strategy and strategy.lower() != "hmac" and strategy.lower() != "jwt":
-            raise Exception("Invalid `strategy`. Valid options are `HMAC` or `JWT`.")
-        if strategy and not secret:
-            raise Exception(
-                "Missing `secret`. You can find it in your project in Advanced settings."
-            )
-        if secret and not strategy:
-            raise Exception(
-                "Got `secret` but missing `strategy`. Valid options are `HMAC` or `JWT`."
-            )
+        self._secret = secret
+        self._strategy = strategy
+        self.clock = clock if clock else DEFAULT_CLOCK
+        self._signer = resolve_signer(strategy, secret)
+
+    secret = _signer_option("secret")
+    strategy = _signer_option("strategy")
+    signer = property(_signer)
+
+    def v(self) -> str:
+        return self.meta["v"] if "v" in self.meta else self.clock.v()
 
     def querystring(self) -> str:
-        default_v = {
-            "__v": self.meta.get("v", str(int(time())))
-        }  # This forces crawlers to refresh the image
+        default_v = {"__v": self.v()}  # This forces crawlers to refresh the image
         defaults_without_v = {
             "__id": self.meta.get("id"),
             "_w": self.meta.get("width"),
@@ -60,9 +96,9 @@ class FlyyerRender:
             "_res": self.meta.get("resolution"),
             "_ua": self.meta.get("agent"),
         }
-        if self.strategy and self.secret:
-            key = self.secret.encode("ASCII")
-            if self.strategy.lower() == "hmac":
+        strategy = self.signer.strategy
+        if strategy:
+            if strategy == "hmac":
                 data = "#".join(
                     [
                         self.deck,
@@ -77,7 +113,7 @@ class FlyyerRender:
                         ),
                     ],
                 ).encode("ASCII")
-                __hmac = hmac.new(key, data, sha256).hexdigest()[:16]
+                __hmac = self.signer.sign(data)
                 return to_query(
                     {
                         **default_v,
@@ -86,7 +122,7 @@ class FlyyerRender:
                         "__hmac": __hmac,
                     }
                 )
-            elif self.strategy.lower() == "jwt":
+            elif strategy == "jwt":
                 jwt_defaults = {
                     "i": self.meta.get("id"),
                     "w": self.meta.get("width"),
@@ -102,7 +138,7 @@ class FlyyerRender:
                     "e": self.extension,
                     **jwt_defaults,
                 }
-                __jwt = jwt.encode(data, key, algorithm="HS256", headers=None)
+                __jwt = self.signer.sign(data)
                 return to_query({"__jwt": __jwt, **default_v})
         else:
             return to_query({**default_v, **defaults_without_v, **self.variables})
@@ -110,7 +146,7 @@ class FlyyerRender:
     def href(self) -> str:
         query = self.querystring()
         base_href = "https://cdn.flyyer.io/render/v2"
-        if self.strategy and self.strategy.lower() == "jwt":
+        if self.signer.strategy == "jwt":
             return f"{base_href}/{self.tenant}?{query}"
         final_href = f"{base_href}/{self.tenant}/{self.deck}/{self.template}"
         if self.version:
@@ -119,6 +155,73 @@ class FlyyerRender:
             final_href += f".{self.extension}"
         return f"{final_href}?{query}"
 
+    def href_bytes(self) -> bytes:
+        return self.href().encode("utf-8")
+
+    def write_href(self, buffer) -> int:
+        # Appends the href to a `bytearray` or binary stream, returns its length.
+        return _write_href(buffer, self.href())
+
+    def href_many(self, items: Iterable[Optional[Mapping[Any, Any]]]) -> List[str]:
+        # Same as calling `href()` for each `variables` in `items` while sharing
+        # deck, template, meta, secret and strategy across the whole batch.
+        return _href_many(self.prepare(), items)
+
+    async def ahref_many(self, items: Iterable[Optional[Mapping[Any, Any]]], **options) -> List[str]:
+        # `href_many()` that yields to the event loop, see `flyyer.aio.ahref_many`.
+        from flyyer.aio import ahref_many
+
+        return await ahref_many(self, items, **options)
+
+    def prepare(self) -> "PreparedFlyyerRender":
+        return PreparedFlyyerRender(_FlyyerRenderState(self), self.variables)
+
+    @classmethod
+    def from_href(cls, href: str, secret: Optional[str] = None) -> "FlyyerRender":
+        # Inverse of `href()`. Pass the `secret` to get a signed object back.
+        parts = _split_render_href(href)
+        if parts is None:
+            raise Exception("Invalid `href`. It is not a Flyyer Render URL.")
+        tenant, deck, filename, query = parts
+        params = decode_pairs(query)
+        if deck is None:
+            payload = _jwt_payload(params.get("__jwt", ""))
+            meta = {
+                name: payload[key]
+                for key, name in _JWT_META_KEYS
+                if payload.get(key) is not None
+            }
+            if "__v" in params:
+                meta["v"] = params["__v"]
+            return cls(
+                tenant=tenant,
+                deck=payload.get("d"),
+                template=payload.get("t"),
+                version=payload.get("v"),
+                extension=payload.get("e"),
+                variables=payload.get("var"),
+                meta=meta,
+                secret=secret,
+                strategy="JWT" if secret else None,
+            )
+        template, _, suffix = filename.partition(".")
+        version, _, extension = suffix.rpartition(".")
+        if not version and extension.isdigit():
+            version, extension = extension, ""
+        signed = params.pop("__hmac", None) is not None
+        meta = {name: params.pop(key) for key, name in _QUERY_META_KEYS if key in params}
+        return cls(
+            tenant=tenant,
+            deck=deck,
+            template=template,
+            version=version or None,
+            extension=extension or None,
+            variables=params,
+            meta=meta,
+            secret=secret if signed else None,
+            strategy="HMAC" if signed and secret else None,
+        )
+
     def __str__(self):
         return self.href()
 
@@ -133,31 +236,29 @@ class Flyyer:
         variables: Optional[Mapping[Any, Any]] = None,
         meta: Optional[FlyyerMeta] = None,
         default: Optional[str] = None,
+        clock: Optional[FlyyerClock] = None,
     ):
         self.project = project
-        self.path = path if path.startswith("/") else "/" + path
+        self.path = _normalize_path(path)
         self.default = default
-        self.secret = secret
-        self.strategy = strategy
+        self._secret = secret
+        self._strategy = strategy
         self.variables = variables if variables else {}
         self.meta = meta if meta else {}
-        if strategy and strategy.lower() != "hmac" and strategy.lower() != "jwt":
-            raise Exception("Invalid `strategy`. Valid options are `HMAC` or `JWT`.")
-        if strategy and not secret:
-            raise Exception(
-                "Missing `secret`. You can find it in your project in Advanced settings."
-            )
-        if secret and not strategy:
-            raise Exception(
-                "Got `secret` but missing `strategy`. Valid options are `HMAC` or `JWT`."
-            )
+        self.clock = clock if clock else DEFAULT_CLOCK
+        self._signer = resolve_signer(strategy, secret)
+
+    secret = _signer_option("secret")
+    strategy = _signer_option("strategy")
+    signer = property(_signer)
+
+    def v(self) -> str:
+        return self.meta["v"] if "v" in self.meta else self.clock.v()
 
     def params_hash(self, ignoreV, isJWT=False) -> Union[str, dict]:
         if not isJWT:
             defaults = {
-                "__v": self.meta.get(
-                    "v", str(int(time()))
-                ),  # This forces crawlers to refresh the image
+                "__v": self.v(),  # This forces crawlers to refresh the image
                 "__id": self.meta.get("id"),
                 "_w": self.meta.get("width"),
                 "_h": self.meta.get("height"),
@@ -184,64 +285,557 @@ class Flyyer:
             return jwt_defaults
 
     def querystring(self, ignoreV=False) -> str:
-        params = self.params_hash(ignoreV)
-        aux = to_query(params).split("&")
-        aux.sort()
-        return "&".join(aux)
+        return sorted_query(self.params_hash(ignoreV))
 
     def sign(self) -> str:
-        # strategy & secret consistency checked on init
-        if self.strategy == None:
+        # strategy & secret resolved to `self.signer`
+        strategy = self.signer.strategy
+        if strategy == None:
             return "_"
-        key = self.secret.encode("ASCII")
-        if self.strategy and self.strategy.lower() == "hmac":
+        if strategy == "hmac":
             data = (self.project + self.path + self.querystring(True)).encode("ASCII")
-            return hmac.new(key, data, sha256).hexdigest()[:16]
-        elif self.strategy and self.strategy.lower() == "jwt":
+            return self.signer.sign(data)
+        elif strategy == "jwt":
             data = {k: v for k, v in self.params_hash(True, True).items() if v is not None}
-            return jwt.encode(data, key, algorithm="HS256", headers=None)
+            return self.signer.sign(data)
 
     def href(self) -> str:
         signature = self.sign()
-        if self.strategy and self.strategy.lower() == "jwt":
-            final_version = self.meta.get("v", str(int(time())))
+        if self.signer.strategy == "jwt":
+            final_version = self.v()
             return f"https://cdn.flyyer.io/v2/{self.project}/jwt-{signature}?__v={final_version}"
         else:
             query = self.querystring()
             return f"https://cdn.flyyer.io/v2/{self.project}/{signature}/{query}{self.path}"
 
+    def href_bytes(self) -> bytes:
+        return self.href().encode("utf-8")
+
+    def write_href(self, buffer) -> int:
+        # Appends the href to a `bytearray` or binary stream, returns its length.
+        return _write_href(buffer, self.href())
+
+    def href_many(
+        self, items: Iterable[Tuple[str, Optional[Mapping[Any, Any]]]]
+    ) -> List[str]:
+        # Same as calling `href()` for each `(path, variables)` in `items` while
+        # sharing project, meta, default, secret and strategy across the batch.
+        return _href_many(self.prepare(), items)
+
+    async def ahref_many(
+        self, items: Iterable[Tuple[str, Optional[Mapping[Any, Any]]]], **options
+    ) -> List[str]:
+        # `href_many()` that yields to the event loop, see `flyyer.aio.ahref_many`.
+        from flyyer.aio import ahref_many
+
+        return await ahref_many(self, items, **options)
+
+    def prepare(self) -> "PreparedFlyyer":
+        return PreparedFlyyer(_FlyyerState(self), self.path, self.variables)
+
+    @classmethod
+    def from_href(cls, href: str, secret: Optional[str] = None) -> "Flyyer":
+        # Inverse of `href()`. Pass the `secret` to get a signed object back.
+        parts = _split_flyyer_href(href)
+        if parts is None:
+            raise Exception("Invalid `href`. It is not a Flyyer URL.")
+        project, signature, query, path = parts
+        if signature.startswith("jwt-"):
+            payload = _jwt_payload(signature[len("jwt-") :])
+            params = payload.get("params") or {}
+            meta = {
+                name: params[key]
+                for key, name in _JWT_META_KEYS
+                if params.get(key) is not None
+            }
+            v = decode_pairs(query).get("__v")
+            if v is not None:
+                meta["v"] = v
+            return cls(
+                project=project,
+                path=payload.get("path") or "/",
+                secret=secret,
+                strategy="JWT" if secret else None,
+                variables=params.get("var"),
+                meta=meta,
+                default=params.get("def"),
+            )
+        params = decode_pairs(query)
+        meta = {name: params.pop(key) for key, name in _QUERY_META_KEYS if key in params}
+        signed = signature != "_"
+        return cls(
+            project=project,
+            path=path,
+            secret=secret if signed else None,
+            strategy="HMAC" if signed and secret else None,
+            variables=params,
+            meta=meta,
+            default=params.pop("_def", None),
+        )
+
     def __str__(self):
         return self.href()
 
 
-# From https://stackoverflow.com/a/43347067/3416691
-# Alternative: https://stackoverflow.com/a/4014164/3416691
-def to_query(params: Mapping[Any, Any]) -> str:
-    g_encode_params = {}
-
-    def _encode_params(params, p_key=None):
-        encode_params = {}
-        if params is None:
-            pass  # skip
-        elif isinstance(params, dict):
-            for key in params:
-                encode_key = "{}[{}]".format(p_key, key)
-                encode_params[encode_key] = params[key]
-        elif isinstance(params, (list, tuple)):
-            for offset, value in enumerate(params):
-                encode_key = "{}[{}]".format(p_key, offset)
-                encode_params[encode_key] = value
-        elif isinstance(params, (bool)):
-            g_encode_params[p_key] = str(params).lower()
+class _FlyyerRenderState:
+    # Everything `FlyyerRender.href()` derives from its constructor arguments
+    # except `variables`, computed once and shared by prepared renders.
+    __slots__ = (
+        "render",
+        "strategy",
+        "signer",
+        "meta",
+        "default_pairs",
+        "data_prefix",
+        "base_href",
+        "jwt_defaults",
+    )
+
+    # Variables with these keys change the layout of the query, those pages
+    # take the regular `FlyyerRender.href()` path.
+    reserved = frozenset(["__v", "__id", "_w", "_h", "_res", "_ua", "__hmac"])
+
+    def __init__(self, render: FlyyerRender):
+        meta = dict(render.meta)
+        self.render = FlyyerRender(
+            tenant=render.tenant,
+            deck=render.deck,
+            template=render.template,
+            version=render.version,
+            extension=render.extension,
+            meta=meta,
+            secret=render.secret,
+            strategy=render.strategy,
+            clock=render.clock,
+        )
+        self.meta = meta
+        self.signer = render.signer
+        self.strategy = render.signer.strategy
+        self.default_pairs = encode_pairs(
+            {
+                "__id": meta.get("id"),
+                "_w": meta.get("width"),
+                "_h": meta.get("height"),
+                "_res": meta.get("resolution"),
+                "_ua": meta.get("agent"),
+            }
+        )
+        self.data_prefix = None
+        if self.strategy == "hmac":
+            self.data_prefix = "#".join(
+                [
+                    render.deck,
+                    render.template,
+                    render.version or "",
+                    render.extension or "",
+                    "",
+                ]
+            )
+        base_href = f"https://cdn.flyyer.io/render/v2/{render.tenant}"
+        self.jwt_defaults = None
+        if self.strategy == "jwt":
+            self.jwt_defaults = {
+                "d": render.deck,
+                "t": render.template,
+                "v": render.version,
+                "e": render.extension,
+                "i": meta.get("id"),
+                "w": meta.get("width"),
+                "h": meta.get("height"),
+                "r": meta.get("resolution"),
+                "u": meta.get("agent"),
+            }
+        else:
+            base_href += f"/{render.deck}/{render.template}"
+            if render.version:
+                base_href += f".{render.version}"
+            if render.extension:
+                base_href += f".{render.extension}"
+        self.base_href = base_href
+
+    def href(self, variables: Mapping[Any, Any]) -> str:
+        v = self.render.v()
+        if self.strategy == "jwt":
+            token = self.signer.sign({**self.jwt_defaults, "var": variables})
+            return f"{self.base_href}?{to_query({'__jwt': token, '__v': v})}"
+        if not self.reserved.isdisjoint(variables):
+            render = self.render
+            return FlyyerRender(
+                tenant=render.tenant,
+                deck=render.deck,
+                template=render.template,
+                version=render.version,
+                extension=render.extension,
+                variables=variables,
+                meta=self.meta,
+                secret=render.secret,
+                strategy=render.strategy,
+                clock=render.clock,
+            ).href()
+        pairs = self.default_pairs + encode_pairs(variables)
+        query = encode_pairs({"__v": v})
+        query.extend(pairs)
+        if self.strategy == "hmac":
+            data = (self.data_prefix + "&".join(pairs)).encode("ASCII")
+            query.append("__hmac=" + self.signer.sign(data))
+        return f"{self.base_href}?{'&'.join(query)}"
+
+
+class PreparedFlyyerRender:
+    # Immutable FlyyerRender: tenant, template, meta, secret and strategy are
+    # validated and pre-encoded once and shared by every derived page. Fields
+    # are read-only, `meta` and `variables` return copies.
+    __slots__ = ("_state", "_variables")
+
+    def __init__(self, state: _FlyyerRenderState, variables: Mapping[Any, Any]):
+        self._state = state
+        self._variables = variables if variables else {}
+
+    tenant = property(lambda self: self._state.render.tenant)
+    deck = property(lambda self: self._state.render.deck)
+    template = property(lambda self: self._state.render.template)
+    version = property(lambda self: self._state.render.version)
+    extension = property(lambda self: self._state.render.extension)
+    variables = property(lambda self: dict(self._variables))
+    meta = property(lambda self: dict(self._state.meta))
+    secret = property(lambda self: self._state.render.secret)
+    strategy = property(lambda self: self._state.render.strategy)
+    clock = property(lambda self: self._state.render.clock)
+
+    def with_variables(
+        self, variables: Optional[Mapping[Any, Any]]
+    ) -> "PreparedFlyyerRender":
+        return PreparedFlyyerRender(self._state, variables)
+
+    def __reduce__(self):
+        # Pickled as config only, see `_prepared_state()`.
+        render = self._state.render
+        config = (
+            render.tenant,
+            render.deck,
+            render.template,
+            render.version,
+            render.extension,
+            tuple(self._state.meta.items()),
+            render.secret,
+            render.strategy,
+            _clock_config(render.clock),
+        )
+        return _prepared_render, (config, self._variables)
+
+    def v(self) -> str:
+        return self._state.render.v()
+
+    def href(self) -> str:
+        return self._state.href(self._variables)
+
+    def href_bytes(self) -> bytes:
+        return self._state.href(self._variables).encode("utf-8")
+
+    def write_href(self, buffer) -> int:
+        # Appends the href to a `bytearray` or binary stream, returns its length.
+        return _write_href(buffer, self._state.href(self._variables))
+
+    def __str__(self):
+        return self.href()
+
+
+class _FlyyerState:
+    # Everything `Flyyer.href()` derives from its constructor arguments except
+    # `path` and `variables`, computed once and shared by prepared pages.
+    __slots__ = (
+        "project",
+        "secret",
+        "strategy",
+        "strategy_option",
+        "signer",
+        "meta",
+        "default",
+        "clock",
+        "v_pairs",
+        "default_pairs",
+        "jwt_params",
+        "base_href",
+    )
+
+    def __init__(self, flyyer: "Flyyer"):
+        meta = dict(flyyer.meta)
+        self.project = flyyer.project
+        self.secret = flyyer.secret
+        self.signer = flyyer.signer
+        self.strategy = flyyer.signer.strategy  # normalized, `strategy_option` as given
+        self.strategy_option = flyyer.strategy
+        self.meta = meta
+        self.default = flyyer.default
+        self.clock = flyyer.clock
+        # `__v` from the clock changes over time, a pinned `meta["v"]` does not.
+        self.v_pairs = encode_pairs({"__v": meta["v"]}) if "v" in meta else None
+        defaults = {
+            "__id": meta.get("id"),
+            "_w": meta.get("width"),
+            "_h": meta.get("height"),
+            "_res": meta.get("resolution"),
+            "_ua": meta.get("agent"),
+            "_def": flyyer.default,
+        }
+        self.default_pairs = [
+            (key, encode_pairs({key: value}))
+            for key, value in defaults.items()
+            if value is not None
+        ]
+        self.jwt_params = {
+            "i": meta.get("id"),
+            "w": meta.get("width"),
+            "h": meta.get("height"),
+            "r": meta.get("resolution"),
+            "u": meta.get("agent"),
+            "def": flyyer.default,
+        }
+        self.base_href = f"https://cdn.flyyer.io/v2/{flyyer.project}"
+
+    def v(self) -> str:
+        return self.meta["v"] if "v" in self.meta else self.clock.v()
+
+    def href(self, path: str, variables: Mapping[Any, Any]) -> str:
+        if self.strategy == "jwt":
+            data = {"path": path, "params": {**self.jwt_params, "var": variables}}
+            signature = self.signer.sign(data)
+            return f"{self.base_href}/jwt-{signature}?__v={self.v()}"
+        pairs = encode_pairs(variables)
+        for key, default_pairs in self.default_pairs:
+            if key not in variables:
+                pairs.extend(default_pairs)
+        sort_pairs(pairs)
+        if self.strategy == "hmac":
+            data = (self.project + path + "&".join(pairs)).encode("ASCII")
+            signature = self.signer.sign(data)
         else:
-            g_encode_params[p_key] = params
+            signature = "_"
+        if "__v" not in variables:
+            v_pairs = self.v_pairs
+            if v_pairs is None:
+                v_pairs = encode_pairs({"__v": self.clock.v()})
+            for pair in v_pairs:
+                insort(pairs, pair)
+        return f"{self.base_href}/{signature}/{'&'.join(pairs)}{path}"
+
+
+class PreparedFlyyer:
+    # Immutable Flyyer: project, meta, default, secret and strategy are
+    # validated and pre-encoded once and shared by every derived page. Fields
+    # are read-only, `meta` and `variables` return copies.
+    __slots__ = ("_state", "_path", "_variables")
+
+    def __init__(
+        self, state: _FlyyerState, path: str, variables: Mapping[Any, Any]
+    ):
+        self._state = state
+        self._path = path
+        self._variables = variables if variables else {}
+
+    project = property(lambda self: self._state.project)
+    path = property(lambda self: self._path)
+    variables = property(lambda self: dict(self._variables))
+    meta = property(lambda self: dict(self._state.meta))
+    default = property(lambda self: self._state.default)
+    secret = property(lambda self: self._state.secret)
+    strategy = property(lambda self: self._state.strategy_option)
+    clock = property(lambda self: self._state.clock)
+
+    def with_path(self, path: str) -> "PreparedFlyyer":
+        return PreparedFlyyer(self._state, _normalize_path(path), self._variables)
+
+    def with_variables(
+        self, variables: Optional[Mapping[Any, Any]]
+    ) -> "PreparedFlyyer":
+        return PreparedFlyyer(self._state, self._path, variables)
+
+    def with_page(
+        self, path: str, variables: Optional[Mapping[Any, Any]] = None
+    ) -> "PreparedFlyyer":
+        return PreparedFlyyer(self._state, _normalize_path(path), variables)
+
+    def __reduce__(self):
+        # Pickled as config only, see `_prepared_state()`.
+        state = self._state
+        config = (
+            state.project,
+            tuple(state.meta.items()),
+            state.default,
+            state.secret,
+            state.strategy_option,
+            _clock_config(state.clock),
+        )
+        return _prepared_flyyer, (config, self._path, self._variables)
+
+    def v(self) -> str:
+        return self._state.v()
+
+    def href(self) -> str:
+        return self._state.href(self._path, self._variables)
+
+    def href_bytes(self) -> bytes:
+        return self._state.href(self._path, self._variables).encode("utf-8")
+
+    def write_href(self, buffer) -> int:
+        # Appends the href to a `bytearray` or binary stream, returns its length.
+        return _write_href(buffer, self._state.href(self._path, self._variables))
+
+    def __str__(self):
+        return self.href()
 
-        for key in encode_params:
-            value = encode_params[key]
-            _encode_params(value, key)
 
-    if isinstance(params, dict):
-        for key in params:
-            _encode_params(params[key], key)
+def _href_many(prepared: Union[PreparedFlyyer, PreparedFlyyerRender], items: Iterable[Any]) -> List[str]:
+    # Batch loop of `href_many()`: `(path, variables)` items for a prepared
+    # Flyyer, `variables` items for a prepared render. Module level so process
+    # pools can run it, see `flyyer.workers` and `flyyer.aio`.
+    state = prepared._state
+    if isinstance(prepared, PreparedFlyyerRender):
+        return [state.href(variables if variables else {}) for variables in items]
+    return [
+        state.href(_normalize_path(path), variables if variables else {})
+        for path, variables in items
+    ]
 
-    return urlencode(g_encode_params)
+
+def _write_href(buffer, href: str) -> int:
+    # One join and one encode of the whole href beat encoding its pieces.
+    data = href.encode("utf-8")
+    if hasattr(buffer, "write"):
+        buffer.write(data)
+    else:
+        buffer.extend(data)
+    return len(data)
+
+
+def _normalize_path(path: str) -> str:
+    return path if path.startswith("/") else "/" + path
+
+
+def _clock_config(clock: FlyyerClock) -> Optional[Tuple[int, Any]]:
+    return None if clock is DEFAULT_CLOCK else (clock.bucket, clock.now)
+
+
+@lru_cache(maxsize=64)
+def _prepared_state(kind: str, key: bytes) -> Union["_FlyyerState", "_FlyyerRenderState"]:
+    # Per-process cache of the derived state of unpickled prepared builders:
+    # every task carrying the same builder shares one state (and its signer,
+    # rebuilt from the secret by `hmac_signer` / `jwt_signer`). Keyed on the
+    # pickled config, not the config itself: `1`, `1.0` and `True` are equal
+    # but render differently.
+    *fields, secret, strategy, clock = pickle.loads(key)
+    options = dict(
+        secret=secret, strategy=strategy, clock=FlyyerClock(*clock) if clock else None
+    )
+    if kind == "render":
+        tenant, deck, template, version, extension, meta = fields
+        render = FlyyerRender(
+            tenant=tenant,
+            deck=deck,
+            template=template,
+            version=version,
+            extension=extension,
+            meta=dict(meta),
+            **options,
+        )
+        return _FlyyerRenderState(render)
+    project, meta, default = fields
+    return _FlyyerState(Flyyer(project=project, meta=dict(meta), default=default, **options))
+
+
+def _cached_state(kind: str, config: Tuple[Any, ...]):
+    return _prepared_state(kind, pickle.dumps(config, protocol=4))
+
+
+def _prepared_flyyer(config, path: str, variables: Mapping[Any, Any]) -> "PreparedFlyyer":
+    return PreparedFlyyer(_cached_state("flyyer", config), path, variables)
+
+
+def _prepared_render(config, variables: Mapping[Any, Any]) -> "PreparedFlyyerRender":
+    return PreparedFlyyerRender(_cached_state("render", config), variables)
+
+
+# Query keys and JWT claims holding `FlyyerMeta` values.
+_QUERY_META_KEYS = [
+    ("__v", "v"),
+    ("__id", "id"),
+    ("_w", "width"),
+    ("_h", "height"),
+    ("_res", "resolution"),
+    ("_ua", "agent"),
+]
+_JWT_META_KEYS = [("i", "id"), ("w", "width"), ("h", "height"), ("r", "resolution"), ("u", "agent")]
+
+# A Flyyer or Flyyer Render URL (absolute or just its path) inside a log line.
+_HREF = re_compile(r"""(?:https?://[^/\s"']+)?/(?:render/)?v2/[^\s"']+""")
+
+
+def _split_flyyer_href(href: str) -> Optional[Tuple[str, str, str, str]]:
+    # `/v2/{project}/{signature}/{query}{path}` into its raw (still quoted)
+    # parts. JWT URLs `/v2/{project}/jwt-{token}?__v=` have an empty path.
+    url = urlsplit(href)
+    if not url.path.startswith("/v2/"):
+        return None
+    project, _, rest = url.path[len("/v2/") :].partition("/")
+    signature, _, rest = rest.partition("/")
+    if not project or not signature:
+        return None
+    if signature.startswith("jwt-"):
+        return None if rest else (project, signature, url.query, "")
+    query, slash, path = rest.partition("/")
+    if not slash:
+        return None
+    return project, signature, query, "/" + path + ("?" + url.query if url.query else "")
+
+
+def _split_render_href(
+    href: str,
+) -> Optional[Tuple[str, Optional[str], Optional[str], str]]:
+    # `/render/v2/{tenant}/{deck}/{template}[.version][.extension]?{query}`
+    # into its raw parts. JWT URLs `/render/v2/{tenant}?__jwt=` have no deck.
+    url = urlsplit(href)
+    if not url.path.startswith("/render/v2/"):
+        return None
+    tenant, slash, rest = url.path[len("/render/v2/") :].partition("/")
+    if not tenant:
+        return None
+    if not slash:
+        return tenant, None, None, url.query
+    deck, _, filename = rest.partition("/")
+    if not deck or not filename or "/" in filename:
+        return None
+    return tenant, deck, filename, url.query
+
+
+def _jwt_payload(token: str) -> Mapping[str, Any]:
+    # Claims of a token without checking its signature, see `FlyyerVerifier`.
+    try:
+        segment = token.split(".")[1].encode("ASCII")
+        payload = loads(urlsafe_b64decode(segment + b"=" * (-len(segment) % 4)))
+    except (IndexError, UnicodeEncodeError, ValueError):
+        raise Exception("Invalid `href`. Its JWT could not be decoded.")
+    if not isinstance(payload, dict):
+        raise Exception("Invalid `href`. Its JWT could not be decoded.")
+    return payload
+
+
+def from_hrefs(
+    lines: Iterable[str], secret: Optional[str] = None
+) -> Iterator[Union[Flyyer, FlyyerRender]]:
+    # Lazily parses every Flyyer or Flyyer Render URL found in `lines`, e.g. an
+    # access log. Lines without a URL and URLs that cannot be parsed are skipped.
+    search = _HREF.search
+    for line in lines:
+        match = search(line)
+        if match is None:
+            continue
+        href = match.group(0)
+        cls = FlyyerRender if href.find("/render/v2/") != -1 else Flyyer
+        try:
+            yield cls.from_href(href, secret)
+        except Exception:
+            continue
+
+
+def to_query(params: Mapping[Any, Any]) -> str:
+    return "&".join(encode_pairs(params))
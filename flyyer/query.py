@@ -0,0 +1,161 @@
+from bisect import bisect_right
+from functools import lru_cache
+from re import compile as re_compile
+from typing import Any, Dict, Iterable, List, Mapping
+from urllib.parse import quote_plus, unquote_plus
+
+# Characters `quote_plus` leaves untouched, so matching strings skip quoting.
+# `~` is only left untouched since Python 3.7.
+_is_safe = re_compile(
+    r"[A-Za-z0-9_.~-]*\Z" if quote_plus("~") == "~" else r"[A-Za-z0-9_.-]*\Z"
+).match
+
+
+@lru_cache(maxsize=4096, typed=True)
+def _quote_key(key: Any) -> str:
+    # Keys repeat across pages (`title`, `items[0][text]`...) so they are quoted once.
+    return quote_plus(key) if isinstance(key, bytes) else quote_plus(str(key))
+
+
+def _quote_value(value: Any) -> str:
+    if isinstance(value, bytes):
+        return quote_plus(value)
+    value = str(value)
+    return value if _is_safe(value) else quote_plus(value)
+
+
+def encode_pairs(params: Mapping[Any, Any]) -> List[str]:
+    # Iterative equivalent of the former recursive `to_query` walker: nested
+    # dicts and lists are flattened to bracket keys (`a[b][0][c]`) depth-first,
+    # `None` is skipped and booleans become `true`/`false`. Returns `key=value`
+    # pairs in insertion order, exactly as `urlencode` would have joined them.
+    leaves = {}
+    if not isinstance(params, dict):
+        return []
+    stack = [iter(params.items())]
+    while stack:
+        for key, value in stack[-1]:
+            if value is None:
+                continue
+            if isinstance(value, dict):
+                # Siblings formatting to the same key (`1` and `"1"`) are merged
+                # before descending: the later value at the earlier position.
+                children = {f"{key}[{child}]": item for child, item in value.items()}
+                stack.append(iter(children.items()))
+                break
+            if isinstance(value, (list, tuple)):
+                stack.append(iter([(f"{key}[{index}]", item) for index, item in enumerate(value)]))
+                break
+            if isinstance(value, bool):
+                value = "true" if value else "false"
+            leaves[key] = value
+        else:
+            stack.pop()
+    return [_quote_key(key) + "=" + _quote_value(value) for key, value in leaves.items()]
+
+
+def sort_pairs(pairs: List[str]) -> List[str]:
+    # Canonical order of a Flyyer querystring, sorts in place.
+    pairs.sort()
+    return pairs
+
+
+def sorted_pairs(params: Mapping[Any, Any]) -> List[str]:
+    return sort_pairs(encode_pairs(params))
+
+
+def sorted_query(params: Mapping[Any, Any]) -> str:
+    return "&".join(sorted_pairs(params))
+
+
+class SortedPairs:
+    # A sorted list of pairs kept together with its joined querystring, so
+    # that adding or dropping a few pairs is a splice of the joined string
+    # instead of a new sort and join over every pair.
+    __slots__ = ("pairs", "joined", "offsets")
+
+    def __init__(self, pairs: List[str]):
+        self.pairs = sorted(pairs)
+        self.joined = "&".join(self.pairs)
+        offsets = []
+        position = 0
+        for pair in self.pairs:
+            offsets.append(position)
+            position += len(pair) + 1
+        offsets.append(position)
+        self.offsets = offsets
+
+    def merge(self, extra: List[str], removed: Iterable[int] = ()) -> str:
+        # Same as `"&".join(sorted(kept + extra))` where `kept` are the pairs
+        # whose index is not in `removed`. Sorts `extra` in place.
+        pairs, joined, offsets = self.pairs, self.joined, self.offsets
+        if not extra and not removed:
+            return joined
+        extra.sort()
+        cuts = sorted(set(removed))
+        end = len(pairs)
+        pieces = []
+        index = e = r = 0
+        while True:
+            insert_at = bisect_right(pairs, extra[e], index) if e < len(extra) else end
+            cut_at = cuts[r] if r < len(cuts) else end
+            stop = min(insert_at, cut_at)
+            if stop > index:
+                pieces.append(joined[offsets[index] : offsets[stop] - 1])
+            index = stop
+            if e < len(extra) and insert_at == stop:
+                pieces.append(extra[e])
+                e += 1
+            elif r < len(cuts) and cut_at == stop:
+                index = stop + 1
+                r += 1
+            else:
+                return "&".join(pieces)
+
+
+def _unquote(value: str) -> str:
+    return unquote_plus(value) if "%" in value or "+" in value else value
+
+
+# Bracketed keys are always quoted (`a%5Bb%5D`) and repeat across URLs.
+_unquote_key = lru_cache(maxsize=4096)(_unquote)
+
+
+def _listify(node: Any) -> Any:
+    # `{"0": a, "1": b}` came from a list: `to_query` encodes both the same way.
+    if not isinstance(node, dict):
+        return node
+    for key, value in node.items():
+        if isinstance(value, dict):
+            node[key] = _listify(value)
+    if node and all(key == str(index) for index, key in enumerate(node)):
+        return list(node.values())
+    return node
+
+
+def decode_pairs(query: str) -> Dict[str, Any]:
+    # Inverse of `encode_pairs`: `a[b][0][c]=x` becomes `{"a": {"b": [{"c": "x"}]}}`.
+    # Values come back as strings (`true`, `1999`...), which encode identically.
+    result = {}
+    for pair in query.split("&"):
+        if not pair:
+            continue
+        key, _, value = pair.partition("=")
+        key = _unquote_key(key)
+        value = _unquote(value)
+        bracket = key.find("[")
+        if bracket <= 0 or not key.endswith("]"):
+            result[key] = value
+            continue
+        node = result
+        name = key[:bracket]
+        for part in key[bracket + 1 : -1].split("]["):
+            child = node.get(name)
+            if not isinstance(child, dict):
+                child = node[name] = {}
+            node, name = child, part
+        node[name] = value
+    for key, value in result.items():
+        if isinstance(value, dict):
+            result[key] = _listify(value)
+    return result
@@ -0,0 +1,190 @@
+from argparse import ArgumentParser
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from struct import pack
+from threading import Lock, Thread
+from time import perf_counter, sleep
+from typing import Any, Callable, Dict, List, Optional, Union
+from zlib import compress, crc32
+import sys
+
+from flyyer.flyyer import _split_flyyer_href, _split_render_href
+from flyyer.stats import percentile
+from flyyer.verify import FlyyerVerifier
+
+
+def placeholder_png(width: int = 1, height: int = 1) -> bytes:
+    # A valid grayscale PNG of the given size.
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return pack(">I", len(data)) + kind + data + pack(">I", crc32(kind + data) & 0xFFFFFFFF)
+
+    rows = b"".join(b"\x00" + b"\xcc" * width for _ in range(height))
+    return b"".join(
+        [
+            b"\x89PNG\r\n\x1a\n",
+            chunk(b"IHDR", pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0)),
+            chunk(b"IDAT", compress(rows)),
+            chunk(b"IEND", b""),
+        ]
+    )
+
+
+class _ThreadingServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class MockCDN:
+    # Local stand-in for `cdn.flyyer.io` for end-to-end and load tests. Serves
+    # a placeholder image for every URL in a `Flyyer.href()` or
+    # `FlyyerRender.href()` layout: 404 for other paths and, with a `secret`,
+    # 403 for URLs whose signature does not verify. `latency` (seconds, or a
+    # callable returning them) is added to every response.
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        secret: Optional[str] = None,
+        latency: Union[float, Callable[[], float]] = 0.0,
+        image: Optional[bytes] = None,
+        content_type: str = "image/png",
+        samples: int = 10000,
+    ):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.image = image if image is not None else placeholder_png()
+        self.content_type = content_type
+        self.samples = samples
+        self._verifier = FlyyerVerifier(secret) if secret else None
+        self._lock = Lock()
+        self._httpd = None
+        self._thread = None
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.statuses = defaultdict(int)
+            self._latencies = deque(maxlen=self.samples)  # seconds, server side
+
+    def status(self, path: str) -> int:
+        layout = _split_render_href(path) or _split_flyyer_href(path)
+        if layout is None:
+            return 404
+        if self._verifier is not None and not self._verifier.verify(path):
+            return 403
+        return 200
+
+    def _record(self, status: int, elapsed: float):
+        with self._lock:
+            self.requests += 1
+            self.statuses[status] += 1
+            self._latencies.append(elapsed)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            ordered = sorted(self._latencies)
+            return {
+                "requests": self.requests,
+                "statuses": dict(self.statuses),
+                "p50": percentile(ordered, 0.50),
+                "p90": percentile(ordered, 0.90),
+                "p99": percentile(ordered, 0.99),
+                "max": ordered[-1] if ordered else 0.0,
+            }
+
+    def _handler(self):
+        cdn = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _respond(self):
+                start = perf_counter()
+                status = cdn.status(self.path)
+                latency = cdn.latency() if callable(cdn.latency) else cdn.latency
+                if latency:
+                    sleep(latency)
+                # Counted before replying, so clients never see stale counters.
+                cdn._record(status, perf_counter() - start)
+                body = cdn.image if status == 200 else b""
+                self.send_response(status)
+                self.send_header("Content-Type", cdn.content_type if status == 200 else "text/plain")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("Cache-Control", "public, max-age=31536000" if status == 200 else "no-store")
+                self.end_headers()
+                if self.command == "GET":
+                    self.wfile.write(body)
+
+            do_GET = _respond
+            do_HEAD = _respond
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    @property
+    def url(self) -> str:
+        # Pass as `CDNWarmer(base_url=...)` to point generated hrefs here.
+        return f"http://{self.host}:{self.port}"
+
+    def start(self) -> "MockCDN":
+        self._httpd = _ThreadingServer((self.host, self.port), self._handler())
+        self.port = self._httpd.server_address[1]
+        self._thread = Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._thread.join()
+            self._httpd = self._thread = None
+
+    def serve_forever(self):
+        self._httpd = _ThreadingServer((self.host, self.port), self._handler())
+        self.port = self._httpd.server_address[1]
+        try:
+            self._httpd.serve_forever()
+        finally:
+            self._httpd.server_close()
+            self._httpd = None
+
+    def __enter__(self) -> "MockCDN":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = ArgumentParser(prog="python -m flyyer.server", description="Local mock of the Flyyer CDN.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--secret", help="verify HMAC and JWT signatures with this secret")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--size", default="1x1", help="placeholder image size, e.g. 1200x630")
+    args = parser.parse_args(argv)
+
+    width, _, height = args.size.partition("x")
+    cdn = MockCDN(
+        host=args.host,
+        port=args.port,
+        secret=args.secret,
+        latency=args.latency,
+        image=placeholder_png(int(width), int(height or width)),
+    )
+    print(f"Serving on {cdn.url}", file=sys.stderr)
+    try:
+        cdn.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(cdn.stats(), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
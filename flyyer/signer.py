@@ -0,0 +1,169 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from functools import lru_cache
+from hashlib import sha256
+from json import dumps, loads
+from typing import Any, Mapping, Optional, Union
+import hmac
+
+# Signers implement `strategy` and `sign()`, which `Flyyer` and `FlyyerRender`
+# resolve at init (and again after `strategy` or `secret` change) and call per href:
+# - `strategy = None`: unsigned URLs, `sign()` is never called.
+# - `strategy = "hmac"`: `sign(data: bytes) -> str`, placed in the URL as is.
+# - `strategy = "jwt"`: `sign(payload: dict) -> str`, a compact JWS.
+# Pass an instance as `strategy=` to plug in your own (accelerated,
+# instrumented...) implementation of one of these layouts. Hrefs of custom
+# signers can only be cached (see `HrefCache`) if they set `cache_key`, a
+# string that is equal for signers producing the same signatures.
+
+
+class UnsignedSigner:
+    __slots__ = ()
+
+    strategy = None
+
+    def sign(self, data: Any) -> str:
+        return "_"
+
+    def __reduce__(self):
+        return "UNSIGNED"
+
+
+UNSIGNED = UnsignedSigner()
+
+
+class HMACSigner:
+    # The HMAC context is keyed once and never updated in place: every message
+    # is signed on a `copy()` so a single instance can be shared across threads.
+    __slots__ = ("_secret", "_hmac")
+
+    strategy = "hmac"
+
+    def __init__(self, secret: str):
+        self._secret = secret
+        self._hmac = hmac.new(secret.encode("ASCII"), digestmod=sha256)
+
+    def __reduce__(self):
+        # HMAC contexts cannot be pickled: the receiving process rebuilds (and
+        # caches) its own from the secret.
+        return hmac_signer, (self._secret,)
+
+    @property
+    def cache_key(self) -> str:
+        return "hmac:" + sha256(self._secret.encode("ASCII")).hexdigest()
+
+    def hexdigest(self, data: bytes) -> str:
+        h = self._hmac.copy()
+        h.update(data)
+        return h.hexdigest()
+
+    def sign(self, data: bytes) -> str:
+        return self.hexdigest(data)[:16]
+
+    def verify(self, data: bytes, signature: str) -> bool:
+        # Constant-time comparison against a (possibly forged) signature.
+        expected = self.sign(data).encode("ASCII")
+        return hmac.compare_digest(expected, signature.encode("utf-8"))
+
+
+@lru_cache(maxsize=128)
+def hmac_signer(secret: str) -> HMACSigner:
+    return HMACSigner(secret)
+
+
+# Set to False to sign JWT URLs with PyJWT instead of the built-in HS256 encoder.
+NATIVE_JWT = True
+
+# Header of PyJWT 2.0 (the locked version), so URLs don't change with `NATIVE_JWT`
+# there. Later PyJWT releases put `alg` first: same claims, different bytes.
+_JWT_HEADER_SEGMENT = urlsafe_b64encode(b'{"typ":"JWT","alg":"HS256"}').rstrip(b"=")
+
+
+class JWTSigner:
+    # HS256 compact JWS encoder, the tokens decode with
+    # `jwt.decode(token, secret, algorithms=["HS256"])`. The header segment is
+    # constant so it is fed to the keyed HMAC context once, at init.
+    __slots__ = ("native", "_key", "_hmac")
+
+    strategy = "jwt"
+
+    def __init__(self, secret: str, native: Optional[bool] = None):
+        self.native = native  # None follows the module-level NATIVE_JWT switch
+        self._key = secret.encode("ASCII")
+        self._hmac = hmac.new(self._key, _JWT_HEADER_SEGMENT + b".", sha256)
+
+    def sign(self, payload: Mapping[str, Any]) -> str:
+        native = NATIVE_JWT if self.native is None else self.native
+        if not native:
+            import jwt
+
+            return jwt.encode(payload, self._key, algorithm="HS256", headers=None)
+        json_payload = dumps(payload, separators=(",", ":")).encode("utf-8")
+        segment = urlsafe_b64encode(json_payload).rstrip(b"=")
+        h = self._hmac.copy()
+        h.update(segment)
+        signature = urlsafe_b64encode(h.digest()).rstrip(b"=")
+        return b".".join([_JWT_HEADER_SEGMENT, segment, signature]).decode("ASCII")
+
+    def __reduce__(self):
+        if self.native is None:
+            return jwt_signer, (self._key.decode("ASCII"),)
+        return JWTSigner, (self._key.decode("ASCII"), self.native)
+
+    def encode(self, payload: Mapping[str, Any]) -> str:
+        return self.sign(payload)
+
+    @property
+    def cache_key(self) -> str:
+        # Depending on its version, PyJWT may not produce the built-in tokens.
+        native = NATIVE_JWT if self.native is None else self.native
+        return ("jwt:" if native else "pyjwt:") + sha256(self._key).hexdigest()
+
+    def verify(self, token: str) -> bool:
+        # Checks the HS256 signature of a compact JWS in constant time. Claims
+        # are not decoded: Flyyer tokens carry no expiration.
+        try:
+            header, payload, signature = token.encode("ASCII").split(b".")
+        except (UnicodeEncodeError, ValueError):
+            return False
+        if header == _JWT_HEADER_SEGMENT:
+            h = self._hmac.copy()
+        else:
+            try:
+                decoded = loads(urlsafe_b64decode(header + b"=" * (-len(header) % 4)))
+            except ValueError:
+                return False
+            if not isinstance(decoded, dict) or decoded.get("alg") != "HS256":
+                return False
+            h = hmac.new(self._key, header + b".", sha256)
+        h.update(payload)
+        expected = urlsafe_b64encode(h.digest()).rstrip(b"=")
+        return hmac.compare_digest(expected, signature)
+
+
+@lru_cache(maxsize=128)
+def jwt_signer(secret: str) -> JWTSigner:
+    return JWTSigner(secret)
+
+
+def resolve_signer(strategy: Union[str, Any, None], secret: Optional[str]):
+    # Validates `strategy` and `secret` and returns the signer for them. A
+    # signer instance passed as `strategy` carries its own key.
+    if strategy is not None and not isinstance(strategy, str):
+        if getattr(strategy, "strategy", None) not in ("hmac", "jwt"):
+            raise Exception("Invalid `strategy`. Signers must set `strategy` to `hmac` or `jwt`.")
+        return strategy
+    if strategy and strategy.lower() != "hmac" and strategy.lower() != "jwt":
+        raise Exception("Invalid `strategy`. Valid options are `HMAC` or `JWT`.")
+    if strategy and not secret:
+        raise Exception(
+            "Missing `secret`. You can find it in your project in Advanced settings."
+        )
+    if secret and not strategy:
+        raise Exception(
+            "Got `secret` but missing `strategy`. Valid options are `HMAC` or `JWT`."
+        )
+    if not strategy:
+        return UNSIGNED
+    if strategy.lower() == "hmac":
+        return hmac_signer(secret)
+    return jwt_signer(secret)
@@ -0,0 +1,178 @@
+from collections import deque
+from threading import Lock, local
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Optional
+
+# Instrumentation works by swapping the functions below for timed wrappers
+# while a collector is enabled, and restoring the originals when it is
+# disabled. Nothing is checked on the hot path while instrumentation is off.
+PHASES = ["href", "encode", "sort", "sign", "assemble"]
+
+_active = None
+_active_lock = Lock()
+
+
+def _targets():
+    from flyyer import cache, flyyer, query, signer
+
+    return [
+        (flyyer.Flyyer, "href", "href"),
+        (flyyer.FlyyerRender, "href", "href"),
+        (flyyer._FlyyerState, "href", "href"),
+        (flyyer._FlyyerRenderState, "href", "href"),
+        (query, "encode_pairs", "encode"),
+        (flyyer, "encode_pairs", "encode"),
+        (query, "sort_pairs", "sort"),
+        (flyyer, "sort_pairs", "sort"),
+        (signer.HMACSigner, "sign", "sign"),
+        (signer.JWTSigner, "sign", "sign"),
+        (cache.HrefCache, "href", "cache"),
+        (cache.SQLiteHrefCache, "href", "cache"),
+    ]
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    # Nearest-rank percentile (`q` in 0..1) of already sorted samples, 0.0 if none.
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class FlyyerStats:
+    # Per-phase call counts, cumulative time and percentiles (over the latest
+    # `samples` calls) for href generation. `href` is the whole call, measured
+    # once for the outermost `href()`; `assemble` is what is left of it after
+    # `encode`, `sort` and `sign`.
+    def __init__(self, samples: int = 1024):
+        self.samples = samples
+        self._hooks = []
+        self._lock = Lock()
+        self._local = local()
+        self._originals = []
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._counts = {phase: 0 for phase in PHASES}
+            self._totals = {phase: 0.0 for phase in PHASES}
+            self._maxes = {phase: 0.0 for phase in PHASES}
+            self._recent = {phase: deque(maxlen=self.samples) for phase in PHASES}
+            self._cache = {"hits": 0, "misses": 0}
+
+    def add_hook(self, hook: Callable[[str, float], Any]):
+        # Called as `hook(phase, seconds)` for every recorded timing.
+        self._hooks.append(hook)
+
+    def remove_hook(self, hook: Callable[[str, float], Any]):
+        self._hooks.remove(hook)
+
+    @property
+    def enabled(self) -> bool:
+        return _active is self
+
+    def enable(self) -> "FlyyerStats":
+        global _active
+        with _active_lock:
+            if _active is self:
+                return self
+            if _active is not None:
+                raise Exception("Another `FlyyerStats` is already enabled.")
+            for owner, name, phase in _targets():
+                original = owner.__dict__[name]
+                self._originals.append((owner, name, original))
+                setattr(owner, name, self._wrap(original, phase))
+            _active = self
+        return self
+
+    def disable(self):
+        global _active
+        with _active_lock:
+            if _active is not self:
+                return
+            while self._originals:
+                owner, name, original = self._originals.pop()
+                setattr(owner, name, original)
+            _active = None
+
+    def __enter__(self) -> "FlyyerStats":
+        return self.enable()
+
+    def __exit__(self, *exc):
+        self.disable()
+
+    def record(self, phase: str, seconds: float):
+        with self._lock:
+            self._counts[phase] += 1
+            self._totals[phase] += seconds
+            if seconds > self._maxes[phase]:
+                self._maxes[phase] = seconds
+            self._recent[phase].append(seconds)
+        for hook in self._hooks:
+            hook(phase, seconds)
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            phases = {}
+            for phase in PHASES:
+                count = self._counts[phase]
+                ordered = sorted(self._recent[phase])
+                phases[phase] = {
+                    "count": count,
+                    "total": self._totals[phase],
+                    "mean": self._totals[phase] / count if count else 0.0,
+                    "p50": percentile(ordered, 0.50),
+                    "p90": percentile(ordered, 0.90),
+                    "p99": percentile(ordered, 0.99),
+                    "max": self._maxes[phase],
+                }
+            return {"phases": phases, "cache": dict(self._cache)}
+
+    def _wrap(self, fn: Callable, phase: str) -> Callable:
+        record = self.record
+        state = self._local
+
+        if phase == "cache":
+
+            def cached(cache, flyyer):
+                hits = cache.hits
+                result = fn(cache, flyyer)
+                key = "hits" if cache.hits > hits else "misses"
+                with self._lock:
+                    self._cache[key] += 1
+                return result
+
+            return cached
+
+        if phase == "href":
+
+            def timed_href(*args, **kwargs):
+                if getattr(state, "depth", 0):
+                    return fn(*args, **kwargs)
+                state.depth = 1
+                state.inner = 0.0
+                start = perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    elapsed = perf_counter() - start
+                    state.depth = 0
+                    record("href", elapsed)
+                    record("assemble", max(0.0, elapsed - state.inner))
+
+            return timed_href
+
+        def timed(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed = perf_counter() - start
+                if getattr(state, "depth", 0):
+                    state.inner += elapsed
+                record(phase, elapsed)
+
+        return timed
+
+
+def active() -> Optional[FlyyerStats]:
+    return _active
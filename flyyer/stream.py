@@ -0,0 +1,138 @@
+from csv import writer as csv_writer
+from itertools import islice
+from json import dumps
+from typing import Any, Callable, Iterable, Iterator, List, Mapping, Optional, Tuple, Union
+from xml.sax.saxutils import escape
+
+from flyyer.flyyer import Flyyer, FlyyerRender, _FlyyerRenderState
+from flyyer.template import LayeredFlyyer
+
+FORMATS = ["jsonl", "csv", "sitemap"]
+
+_SITEMAP_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"'
+    ' xmlns:image="http://www.google.com/schemas/sitemap-image/1.1">\n'
+)
+_SITEMAP_FOOTER = "</urlset>\n"
+
+
+def iter_chunks(iterable: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    if size < 1:
+        raise Exception("Invalid `size`. It must be at least 1.")
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_hrefs(
+    base: Union[Flyyer, FlyyerRender],
+    records: Iterable[Mapping[str, Any]],
+    key: Optional[Callable[[Mapping[str, Any]], Any]] = None,
+    offset: int = 0,
+) -> Iterator[Tuple[Any, str]]:
+    # Lazily yields `(key, href)` for every record, holding one record at a
+    # time. `base` carries the shared settings and variables, records may set
+    # `path` (Flyyer only), `variables` merged over the base ones, `meta` and
+    # `default`. Keys default to `record["key"]`, then the path (Flyyer) or the
+    # position in `records`. Pass the count already written as `offset` to
+    # resume: those records are skipped without generating their hrefs.
+    href = _record_href(base)
+    for index, record in enumerate(islice(records, offset, None), offset):
+        if key is not None:
+            name = key(record)
+        elif "key" in record:
+            name = record["key"]
+        elif isinstance(base, Flyyer):
+            name = record.get("path") or base.path
+        else:
+            name = index
+        yield name, href(record)
+
+
+def _record_href(base: Union[Flyyer, FlyyerRender]) -> Callable[[Mapping[str, Any]], str]:
+    # Records without their own `meta` or `default` share the pre-encoded base.
+    if isinstance(base, FlyyerRender):
+        state = _FlyyerRenderState(base)
+
+        def render_href(record: Mapping[str, Any]) -> str:
+            variables = {**base.variables, **(record.get("variables") or {})}
+            if not record.get("meta"):
+                return state.href(variables)
+            return FlyyerRender(
+                tenant=base.tenant,
+                deck=base.deck,
+                template=base.template,
+                version=base.version,
+                extension=base.extension,
+                variables=variables,
+                meta={**base.meta, **record["meta"]},
+                secret=base.secret,
+                strategy=base.strategy,
+                clock=base.clock,
+            ).href()
+
+        return render_href
+
+    layered = LayeredFlyyer(base)
+
+    def flyyer_href(record: Mapping[str, Any]) -> str:
+        path = record.get("path") or base.path
+        if not record.get("meta") and record.get("default") is None:
+            return layered.href(record.get("variables"), path)
+        return Flyyer(
+            project=base.project,
+            path=path,
+            secret=base.secret,
+            strategy=base.strategy,
+            variables={**base.variables, **(record.get("variables") or {})},
+            meta={**base.meta, **(record.get("meta") or {})},
+            default=record.get("default", base.default),
+            clock=base.clock,
+        ).href()
+
+    return flyyer_href
+
+
+def write_hrefs(
+    pairs: Iterable[Tuple[Any, str]],
+    output,
+    format: str = "jsonl",
+    header: bool = True,
+    site_url: Optional[str] = None,
+) -> int:
+    # Streams `(key, href)` pairs to a text `output` and returns how many were
+    # written. JSONL and CSV can be appended to when resuming (`header=False`
+    # skips the CSV header). Sitemaps list the page `site_url + key` with its
+    # image; keep them under 50,000 URLs per file, e.g. with `iter_chunks`.
+    if format not in FORMATS:
+        raise Exception("Invalid `format`. Valid options are `jsonl`, `csv` or `sitemap`.")
+    count = 0
+    if format == "jsonl":
+        for name, href in pairs:
+            output.write(dumps({"key": name, "href": href}, ensure_ascii=False) + "\n")
+            count += 1
+    elif format == "csv":
+        rows = csv_writer(output)
+        if header:
+            rows.writerow(["key", "href"])
+        for name, href in pairs:
+            rows.writerow([name, href])
+            count += 1
+    else:
+        output.write(_SITEMAP_HEADER)
+        prefix = site_url.rstrip("/") if site_url else ""
+        for name, href in pairs:
+            loc = str(name)
+            if "://" not in loc:
+                loc = prefix + loc
+            output.write(
+                f"<url><loc>{escape(loc)}</loc>"
+                f"<image:image><image:loc>{escape(href)}</image:loc></image:image></url>\n"
+            )
+            count += 1
+        output.write(_SITEMAP_FOOTER)
+    return count
@@ -0,0 +1,113 @@
+from html import escape
+from typing import Any, List, Mapping, Optional, Sequence, Tuple
+
+from flyyer.flyyer import Flyyer, FlyyerMeta
+from flyyer.template import LayeredFlyyer
+
+# `(attribute, name, meta)`: one `<meta {attribute}="{name}" content="{href}">`
+# per preset, `meta` is merged over the Flyyer's own meta for that tag.
+DEFAULT_PRESETS = [
+    ("property", "og:image", {}),
+    ("name", "twitter:image", {}),
+]
+
+# Meta fields presets may change and the query keys holding them.
+_PRESET_KEYS = {
+    "id": "__id",
+    "width": "_w",
+    "height": "_h",
+    "resolution": "_res",
+    "agent": "_ua",
+}
+
+
+class FlyyerMetaTags:
+    # Renders the `<meta>` image tags of one page. The variables are encoded
+    # once and shared by every preset, which only differ in their meta. The
+    # block is memoized, keep one instance per request (or use it as a context
+    # manager) so `__v` is not reused across requests.
+    def __init__(
+        self,
+        flyyer: Flyyer,
+        presets: Optional[Sequence[Tuple[str, str, FlyyerMeta]]] = None,
+        card: Optional[str] = "summary_large_image",
+    ):
+        self.flyyer = flyyer
+        self.presets = list(DEFAULT_PRESETS if presets is None else presets)
+        self.card = card
+        for _, name, meta in self.presets:
+            unknown = [key for key in meta if key not in _PRESET_KEYS]
+            if unknown:
+                raise Exception(
+                    f"Invalid preset `{name}`. Presets can only set `id`, `width`, `height`, `resolution` and `agent`."
+                )
+        self._block = None
+
+    def hrefs(self) -> List[Tuple[str, str, str, Mapping[str, Any]]]:
+        # `(attribute, name, href, meta)` for every preset, in order.
+        flyyer = self.flyyer
+        meta = flyyer.meta
+        strategy = flyyer.signer.strategy
+        layered = None
+        hrefs = []
+        for attribute, name, preset in self.presets:
+            merged = {**meta, **preset}
+            if strategy == "jwt":
+                href = Flyyer(
+                    project=flyyer.project,
+                    path=flyyer.path,
+                    secret=flyyer.secret,
+                    strategy=flyyer.strategy,
+                    variables=flyyer.variables,
+                    meta=merged,
+                    default=flyyer.default,
+                    clock=flyyer.clock,
+                ).href()
+            else:
+                if layered is None:
+                    layered = LayeredFlyyer(flyyer)
+                # A meta field is the default of its query key, variables win.
+                overrides = {
+                    _PRESET_KEYS[key]: value
+                    for key, value in preset.items()
+                    if _PRESET_KEYS[key] not in flyyer.variables
+                }
+                href = layered.href(overrides)
+            hrefs.append((attribute, name, href, merged))
+        return hrefs
+
+    def render(self) -> str:
+        if self._block is not None:
+            return self._block
+        lines = []
+        for attribute, name, href, meta in self.hrefs():
+            lines.append(f'<meta {attribute}="{escape(name)}" content="{escape(href)}">')
+            if name == "og:image":
+                for field in ("width", "height"):
+                    if meta.get(field) is not None:
+                        value = escape(str(meta[field]))
+                        lines.append(f'<meta property="og:image:{field}" content="{value}">')
+        if self.card:
+            lines.append(f'<meta name="twitter:card" content="{escape(self.card)}">')
+        self._block = "\n".join(lines)
+        return self._block
+
+    def clear(self):
+        self._block = None
+
+    def __enter__(self) -> "FlyyerMetaTags":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.clear()
+
+    def __html__(self) -> str:
+        # Jinja2 and Django templates insert the block without escaping it.
+        return self.render()
+
+    def __str__(self):
+        return self.render()
+
+
+def meta_tags(flyyer: Flyyer, **options) -> str:
+    return FlyyerMetaTags(flyyer, **options).render()
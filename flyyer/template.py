@@ -0,0 +1,215 @@
+from typing import Any, Iterable, List, Mapping, Optional
+
+from flyyer.flyyer import (
+    Flyyer,
+    FlyyerRender,
+    _FlyyerRenderState,
+    _FlyyerState,
+    _normalize_path,
+)
+from flyyer.query import SortedPairs, encode_pairs
+
+
+def _check_slots(slots: Iterable[str], reserved: Iterable[str]) -> List[str]:
+    slots = list(dict.fromkeys(slots))
+    for slot in slots:
+        if slot in reserved:
+            raise Exception(f"Invalid slot `{slot}`. It is reserved by Flyyer.")
+    return slots
+
+
+def _has_brackets(keys: Iterable[Any]) -> bool:
+    # `{"a": {"b": 1}}` and `{"a[b]": 1}` both encode to `a%5Bb%5D` and the
+    # later one wins. Shadowed pairs are tracked by variable name, so templates
+    # with bracketed names take the regular `href()` path instead.
+    return any(isinstance(key, str) and "[" in key for key in keys)
+
+
+def _check_values(values: Mapping[Any, Any], slots: frozenset):
+    if not slots.issuperset(values):
+        unknown = ", ".join(f"`{key}`" for key in values if key not in slots)
+        raise Exception(f"Unknown slots {unknown}. Declare them when compiling the template.")
+
+
+class FlyyerTemplate:
+    # A `Flyyer` compiled once into its sorted static query, with `slots`
+    # naming the variables filled per request. `href(values)` is the same as
+    # `Flyyer(..., variables={**variables, **values}).href()` but only encodes
+    # `values` and splices them in, the static pairs are never sorted again.
+    def __init__(self, flyyer: Flyyer, slots: Iterable[str]):
+        self.slots = _check_slots(slots, ["__v"])
+        self.path = flyyer.path
+        self.variables = dict(flyyer.variables)
+        self._state = state = _FlyyerState(flyyer)
+        self._slot_set = slot_set = frozenset(self.slots)
+        # Pairs of a slot missing from `values`: its static variable, else its default.
+        defaults = dict(state.default_pairs)
+        self._fallback_pairs = {}
+        for slot in self.slots:
+            if slot in self.variables:
+                self._fallback_pairs[slot] = encode_pairs({slot: self.variables[slot]})
+            else:
+                self._fallback_pairs[slot] = defaults.get(slot, [])
+        static = encode_pairs(
+            {key: value for key, value in self.variables.items() if key not in slot_set}
+        )
+        for key, pairs in state.default_pairs:
+            if key not in self.variables and key not in slot_set:
+                static.extend(pairs)
+        self._static = SortedPairs(static)
+        self._versioned = "__v" not in self.variables
+        self._bracketed = _has_brackets(self.slots) or _has_brackets(self.variables)
+
+    def href(self, values: Optional[Mapping[Any, Any]] = None, path: Optional[str] = None) -> str:
+        values = values if values else {}
+        _check_values(values, self._slot_set)
+        path = _normalize_path(path) if path else self.path
+        state = self._state
+        if state.strategy == "jwt" or self._bracketed:
+            return state.href(path, {**self.variables, **values})
+        pairs = encode_pairs(values)
+        fallback = self._fallback_pairs
+        for slot in self.slots:
+            if slot not in values:
+                pairs.extend(fallback[slot])
+        query = self._static.merge(pairs)
+        if state.strategy == "hmac":
+            signature = state.signer.sign((state.project + path + query).encode("ASCII"))
+        else:
+            signature = "_"
+        if self._versioned:
+            v_pairs = state.v_pairs
+            if v_pairs is None:
+                v_pairs = encode_pairs({"__v": state.clock.v()})
+            query = self._static.merge(pairs + v_pairs)
+        return f"{state.base_href}/{signature}/{query}{path}"
+
+    def __call__(self, values: Optional[Mapping[Any, Any]] = None, **kwargs) -> str:
+        return self.href({**values, **kwargs} if values else kwargs)
+
+
+class FlyyerRenderTemplate:
+    # A `FlyyerRender` compiled once into the encoded segments of its query,
+    # with `slots` naming the variables filled per request. `href(values)` is
+    # the same as `FlyyerRender(..., variables={**variables, **values}).href()`.
+    def __init__(self, render: FlyyerRender, slots: Iterable[str]):
+        self.slots = _check_slots(slots, _FlyyerRenderState.reserved)
+        self.variables = dict(render.variables)
+        self._state = state = _FlyyerRenderState(render)
+        self._slot_set = slot_set = frozenset(self.slots)
+        self._fallback_pairs = {
+            slot: encode_pairs({slot: self.variables[slot]})
+            for slot in self.slots
+            if slot in self.variables
+        }
+        # Pre-joined static runs of the query, separated by the slots that
+        # already have a position among the static variables.
+        segments = []
+        run = list(state.default_pairs)
+        for key, value in self.variables.items():
+            if key in slot_set:
+                if run:
+                    segments.append("&".join(run))
+                segments.append(key)
+                run = []
+            else:
+                run.extend(encode_pairs({key: value}))
+        if run:
+            segments.append("&".join(run))
+        self._segments = [(segment, segment in slot_set) for segment in segments]
+        self._slow_path = not state.reserved.isdisjoint(self.variables) or (
+            _has_brackets(self.slots) or _has_brackets(self.variables)
+        )
+
+    def href(self, values: Optional[Mapping[Any, Any]] = None) -> str:
+        values = values if values else {}
+        _check_values(values, self._slot_set)
+        state = self._state
+        if state.strategy == "jwt" or self._slow_path:
+            return state.href({**self.variables, **values})
+        pieces = []
+        fallback = self._fallback_pairs
+        for segment, is_slot in self._segments:
+            if not is_slot:
+                pieces.append(segment)
+            elif segment in values:
+                pieces.extend(encode_pairs({segment: values[segment]}))
+            else:
+                pieces.extend(fallback[segment])
+        variables = self.variables
+        pieces.extend(encode_pairs({k: v for k, v in values.items() if k not in variables}))
+        query = encode_pairs({"__v": state.render.v()})
+        query.extend(pieces)
+        if state.strategy == "hmac":
+            data = (state.data_prefix + "&".join(pieces)).encode("ASCII")
+            query.append("__hmac=" + state.signer.sign(data))
+        return f"{state.base_href}?{'&'.join(query)}"
+
+    def __call__(self, values: Optional[Mapping[Any, Any]] = None, **kwargs) -> str:
+        return self.href({**values, **kwargs} if values else kwargs)
+
+
+def compile_template(obj, slots: Iterable[str]):
+    # `FlyyerTemplate` or `FlyyerRenderTemplate` depending on `obj`.
+    if isinstance(obj, FlyyerRender):
+        return FlyyerRenderTemplate(obj, slots)
+    if isinstance(obj, Flyyer):
+        return FlyyerTemplate(obj, slots)
+    raise Exception("Invalid `obj`. Expected a `Flyyer` or `FlyyerRender`.")
+
+
+class LayeredFlyyer:
+    # A `Flyyer` whose `variables` are a base layer (e.g. site-wide defaults)
+    # shared by every page. The base is encoded and sorted once; `href(overrides)`
+    # is the same as `Flyyer(..., variables={**variables, **overrides}).href()`
+    # but only encodes `overrides`, dropping the base pairs they shadow.
+    def __init__(self, flyyer: Flyyer):
+        self.path = flyyer.path
+        self.variables = dict(flyyer.variables)
+        self._state = state = _FlyyerState(flyyer)
+        layer = [
+            (pair, key)
+            for key, value in self.variables.items()
+            for pair in encode_pairs({key: value})
+        ]
+        layer.extend(
+            (pair, key)
+            for key, pairs in state.default_pairs
+            if key not in self.variables
+            for pair in pairs
+        )
+        layer.sort(key=lambda item: item[0])
+        self._bracketed = _has_brackets(self.variables)
+        self._base = SortedPairs([pair for pair, _ in layer])
+        # Positions of each top-level key in the sorted base, to drop shadowed pairs.
+        self._positions = {}
+        for index, (_, key) in enumerate(layer):
+            self._positions.setdefault(key, []).append(index)
+
+    def href(self, overrides: Optional[Mapping[Any, Any]] = None, path: Optional[str] = None) -> str:
+        overrides = overrides if overrides else {}
+        path = _normalize_path(path) if path else self.path
+        state = self._state
+        if state.strategy == "jwt" or self._bracketed or _has_brackets(overrides):
+            return state.href(path, {**self.variables, **overrides})
+        positions = self._positions
+        removed = []
+        for key in overrides:
+            if key in positions:
+                removed.extend(positions[key])
+        pairs = encode_pairs(overrides)
+        query = self._base.merge(pairs, removed)
+        if state.strategy == "hmac":
+            signature = state.signer.sign((state.project + path + query).encode("ASCII"))
+        else:
+            signature = "_"
+        if "__v" not in self.variables and "__v" not in overrides:
+            v_pairs = state.v_pairs
+            if v_pairs is None:
+                v_pairs = encode_pairs({"__v": state.clock.v()})
+            query = self._base.merge(pairs + v_pairs, removed)
+        return f"{state.base_href}/{signature}/{query}{path}"
+
+    def href_many(self, items: Iterable[Any]) -> List[str]:
+        # `(path, overrides)` pairs, like `Flyyer.href_many`.
+        return [self.href(overrides, path or "/") for path, overrides in items]
@@ -0,0 +1,289 @@
+from argparse import ArgumentParser
+from collections import namedtuple
+from json import dumps, load
+from random import Random
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union
+import sys
+
+from flyyer.clock import FlyyerClock
+from flyyer.flyyer import Flyyer, FlyyerRender, to_query
+
+# Differential testing: compare an accelerated implementation against the
+# library (the reference) on randomized cases, and shrink any mismatch to a
+# minimal case. Cases are JSON-serializable so a seeded corpus can be stored
+# with its expected outputs, see `tests/golden_corpus.json`.
+
+SECRET = "sg1j0HVy9bsMihJqa8Qwu8ZYgCYHG0tx"
+NOW = 1618281823  # `__v` of cases without `meta["v"]`
+
+_KEYS = ["title", "a", "b", "c d", "ñandú", "items", "_w", "__v", "_def", "a[b]", "0", "x&y=z"]
+# No `~`: `quote_plus` escapes it before Python 3.7, so corpus outputs would
+# depend on the interpreter.
+_STRINGS = ["", "a", "Hello world!", "ñ&=/?#[]+%", "safe-._", " ", "日本", "a\nb", "😀"]
+
+Mismatch = namedtuple("Mismatch", ["case", "expected", "got", "shrunk"])
+
+
+def random_value(rng: Random, depth: int = 0) -> Any:
+    roll = rng.random()
+    if depth >= 3 or roll < 0.55:
+        return rng.choice(
+            [None, True, False, 0, 1, -7, 1.5, 1e-7, 10 ** 12]
+            + _STRINGS
+            + ["x" * rng.randint(0, 40)]
+        )
+    if roll < 0.8:
+        return {rng.choice(_KEYS): random_value(rng, depth + 1) for _ in range(rng.randint(0, 4))}
+    return [random_value(rng, depth + 1) for _ in range(rng.randint(0, 4))]
+
+
+def random_variables(rng: Random) -> Dict[str, Any]:
+    return {rng.choice(_KEYS): random_value(rng) for _ in range(rng.randint(0, 6))}
+
+
+def random_case(rng: Random) -> Dict[str, Any]:
+    meta = {
+        key: rng.choice(["1", 2, "a b", None, 0.5])
+        for key in ["v", "id", "width", "height", "resolution", "agent"]
+        if rng.random() < 0.3
+    }
+    strategy = rng.choice([None, "HMAC", "JWT", "hmac"])
+    args = {
+        "variables": random_variables(rng),
+        "meta": meta,
+        "secret": SECRET if strategy else None,
+        "strategy": strategy,
+    }
+    if rng.random() < 0.6:
+        args.update(
+            project=rng.choice(["project", "website-com"]),
+            path=rng.choice(["/", "/products/1", "a/b", "/ñ?x=1"]),
+            default=rng.choice([None, "/default.png", "https://a.com/b c.png"]),
+        )
+        return {"kind": "flyyer", "args": args}
+    args.update(
+        tenant="tenant",
+        deck="deck",
+        template=rng.choice(["template", "t-1"]),
+        version=rng.choice([None, "2"]),
+        extension=rng.choice([None, "png", "jpeg"]),
+    )
+    return {"kind": "render", "args": args}
+
+
+def generate_corpus(seed: int = 0, count: int = 1000) -> List[Dict[str, Any]]:
+    rng = Random(seed)
+    return [random_case(rng) for _ in range(count)]
+
+
+def build(case: Dict[str, Any]) -> Union[Flyyer, FlyyerRender]:
+    clock = FlyyerClock(now=lambda: case.get("now", NOW))
+    cls = Flyyer if case["kind"] == "flyyer" else FlyyerRender
+    return cls(clock=clock, **case["args"])
+
+
+def _flyyer(case: Dict[str, Any]) -> Optional[Flyyer]:
+    return build(case) if case["kind"] == "flyyer" else None
+
+
+def _render(case: Dict[str, Any]) -> Optional[FlyyerRender]:
+    return build(case) if case["kind"] == "render" else None
+
+
+# name -> (case to the argument of the implementation, reference implementation)
+TARGETS = {
+    "to_query": (lambda case: case["args"]["variables"], to_query),
+    "querystring": (_flyyer, Flyyer.querystring),
+    "sign": (_flyyer, Flyyer.sign),
+    "href": (build, lambda obj: obj.href()),
+    "render_href": (_render, FlyyerRender.href),
+}
+
+
+def _outcome(fn: Callable[[Any], Any], arg: Any) -> Any:
+    # Errors compare by type: both sides must reject the same inputs.
+    try:
+        return fn(arg)
+    except Exception as error:
+        return f"<raised {type(error).__name__}>"
+
+
+def _simpler_values(value: Any) -> Iterator[Any]:
+    if isinstance(value, dict):
+        for key in value:
+            yield {k: v for k, v in value.items() if k != key}
+        for key, item in value.items():
+            for simpler in _simpler_values(item):
+                yield {**value, key: simpler}
+    elif isinstance(value, list):
+        for index in range(len(value)):
+            yield value[:index] + value[index + 1 :]
+        for index, item in enumerate(value):
+            for simpler in _simpler_values(item):
+                yield value[:index] + [simpler] + value[index + 1 :]
+    elif isinstance(value, str):
+        if value:
+            yield ""
+        if len(value) > 1:
+            yield value[: len(value) // 2]
+            yield value[len(value) // 2 :]
+    elif isinstance(value, (int, float)) and not isinstance(value, bool) and value != 0:
+        yield 0
+
+
+def _simpler_cases(case: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    args = case["args"]
+    for simpler in _simpler_values(args["variables"]):
+        yield {**case, "args": {**args, "variables": simpler}}
+    for simpler in _simpler_values(args["meta"]):
+        yield {**case, "args": {**args, "meta": simpler}}
+    if args["strategy"] is not None:
+        yield {**case, "args": {**args, "strategy": None, "secret": None}}
+    for key, plain in [("default", None), ("path", "/"), ("version", None), ("extension", None)]:
+        if args.get(key, plain) != plain:
+            yield {**case, "args": {**args, key: plain}}
+
+
+def shrink(case: Dict[str, Any], fails: Callable[[Dict[str, Any]], bool], steps: int = 1000) -> Dict[str, Any]:
+    # Greedily applies the first simplification that still fails until none does.
+    for _ in range(steps):
+        for simpler in _simpler_cases(case):
+            if fails(simpler):
+                case = simpler
+                break
+        else:
+            break
+    return case
+
+
+def _rate(fn: Callable[[Any], Any], args: List[Any], repeat: int) -> float:
+    best = None
+    for _ in range(repeat):
+        start = perf_counter()
+        for arg in args:
+            _outcome(fn, arg)
+        elapsed = perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return len(args) / best if best else 0.0
+
+
+class DiffReport:
+    def __init__(self, target: str, cases: int):
+        self.target = target
+        self.cases = cases
+        self.mismatches = []  # `Mismatch`, at most `max_mismatches`
+        self.reference_rate = 0.0  # ops/s
+        self.candidate_rate = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return not self.mismatches
+
+    @property
+    def speedup(self) -> float:
+        return self.candidate_rate / self.reference_rate if self.reference_rate else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "target": self.target,
+            "cases": self.cases,
+            "mismatches": [mismatch._asdict() for mismatch in self.mismatches],
+            "reference_rate": self.reference_rate,
+            "candidate_rate": self.candidate_rate,
+            "speedup": self.speedup,
+        }
+
+
+def run_differential(
+    candidate: Callable[[Any], Any],
+    target: str = "href",
+    cases: Optional[List[Dict[str, Any]]] = None,
+    seed: int = 0,
+    count: int = 1000,
+    reference: Optional[Callable[[Any], Any]] = None,
+    max_mismatches: int = 10,
+    repeat: int = 3,
+) -> DiffReport:
+    # Runs `candidate` and the `target` reference side by side on `cases`
+    # (a seeded random corpus by default). `candidate` takes the same argument
+    # as the reference: the variables for `to_query`, a Flyyer for
+    # `querystring` and `sign`, a Flyyer or FlyyerRender for `href`. Pass
+    # `repeat=0` to skip the throughput measurement.
+    if target not in TARGETS:
+        raise Exception(f"Invalid `target`. Valid options are {', '.join(TARGETS)}.")
+    argument, default_reference = TARGETS[target]
+    reference = reference if reference else default_reference
+    cases = cases if cases is not None else generate_corpus(seed, count)
+    cases = [case for case in cases if argument(case) is not None]
+    report = DiffReport(target, len(cases))
+
+    def fails(case: Dict[str, Any]) -> bool:
+        # Each side gets its own object: implementations may cache on it.
+        return _outcome(reference, argument(case)) != _outcome(candidate, argument(case))
+
+    for case in cases:
+        expected = _outcome(reference, argument(case))
+        got = _outcome(candidate, argument(case))
+        if expected != got:
+            report.mismatches.append(Mismatch(case, expected, got, shrink(case, fails)))
+            if len(report.mismatches) >= max_mismatches:
+                break
+    if repeat and report.ok:
+        args = [argument(case) for case in cases]
+        report.reference_rate = _rate(reference, args, repeat)
+        report.candidate_rate = _rate(candidate, args, repeat)
+    return report
+
+
+def golden(cases: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # Cases with the outputs of every applicable target, as stored in the corpus.
+    entries = []
+    for case in cases:
+        expected = {}
+        for name, (argument, reference) in TARGETS.items():
+            arg = argument(case)
+            if arg is not None:
+                expected[name] = _outcome(reference, arg)
+        entries.append({**case, "expected": expected})
+    return entries
+
+
+def check_golden(entries: List[Dict[str, Any]]) -> List[Mismatch]:
+    mismatches = []
+    for entry in entries:
+        case = {key: value for key, value in entry.items() if key != "expected"}
+        for name, expected in entry["expected"].items():
+            argument, reference = TARGETS[name]
+            got = _outcome(reference, argument(case))
+            if got != expected:
+                mismatches.append(Mismatch(case, expected, got, None))
+    return mismatches
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = ArgumentParser(
+        prog="python -m flyyer.testing",
+        description="Write a seeded golden corpus, or check the library against one.",
+    )
+    parser.add_argument("corpus", help="JSON corpus file")
+    parser.add_argument("--write", action="store_true", help="generate the corpus instead of checking it")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--count", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    if args.write:
+        entries = golden(generate_corpus(args.seed, args.count))
+        with open(args.corpus, "w", encoding="utf-8") as f:
+            # One case per line keeps diffs of a regenerated corpus readable.
+            f.write("[\n" + ",\n".join(dumps(entry, ensure_ascii=False) for entry in entries) + "\n]\n")
+        return 0
+    with open(args.corpus, encoding="utf-8") as f:
+        mismatches = check_golden(load(f))
+    for mismatch in mismatches:
+        print(dumps(mismatch._asdict(), ensure_ascii=False), file=sys.stderr)
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+from typing import Iterable, Iterator, List, Tuple
+from urllib.parse import unquote_plus
+
+from flyyer.flyyer import _HREF, _split_flyyer_href, _split_render_href
+from flyyer.signer import hmac_signer, jwt_signer
+
+
+def _without(pairs: List[str], key: str) -> List[str]:
+    prefix = key + "="
+    return [pair for pair in pairs if not pair.startswith(prefix)]
+
+
+class FlyyerVerifier:
+    # Checks signed URLs produced by `Flyyer.href()` and `FlyyerRender.href()`
+    # for a project secret. Unsigned and malformed URLs do not verify.
+    def __init__(self, secret: str):
+        self.secret = secret
+        self._hmac = hmac_signer(secret)
+        self._jwt = jwt_signer(secret)
+
+    def verify(self, url: str) -> bool:
+        if url.find("/render/v2/") != -1:
+            return self._verify_render(url)
+        return self._verify_flyyer(url)
+
+    def _verify_flyyer(self, url: str) -> bool:
+        parts = _split_flyyer_href(url)
+        if parts is None:
+            return False
+        project, signature, query, path = parts
+        if signature.startswith("jwt-"):
+            return self._jwt.verify(signature[len("jwt-") :])
+        pairs = query.split("&") if query else []
+        # `__v` is not signed, unless it came from the variables themselves.
+        for candidate in (_without(pairs, "__v"), pairs):
+            data = (project + path + "&".join(candidate)).encode("utf-8")
+            if self._hmac.verify(data, signature):
+                return True
+        return False
+
+    def _verify_render(self, url: str) -> bool:
+        parts = _split_render_href(url)
+        if parts is None:
+            return False
+        _, deck, filename, query = parts
+        pairs = query.split("&") if query else []
+        if deck is None:
+            tokens = [pair[len("__jwt=") :] for pair in pairs if pair.startswith("__jwt=")]
+            return len(tokens) == 1 and self._jwt.verify(unquote_plus(tokens[0]))
+        if not pairs or not pairs[-1].startswith("__hmac="):
+            return False
+        signature = pairs[-1][len("__hmac=") :]
+        signed = "&".join(_without(pairs[:-1], "__v"))
+        template, *suffixes = filename.split(".")
+        # `template.12.png`, and `template.png` or `template.12` which are
+        # ambiguous between a version and an extension.
+        if len(suffixes) == 0:
+            candidates = [("", "")]
+        elif len(suffixes) == 1:
+            candidates = [(suffixes[0], ""), ("", suffixes[0])]
+        elif len(suffixes) == 2:
+            candidates = [(suffixes[0], suffixes[1])]
+        else:
+            return False
+        for version, extension in candidates:
+            data = "#".join([deck, template, version, extension, signed]).encode("utf-8")
+            if self._hmac.verify(data, signature):
+                return True
+        return False
+
+    def verify_lines(self, lines: Iterable[str]) -> Iterator[Tuple[str, bool]]:
+        # Streams `(url, valid)` for every Flyyer URL found in `lines` (e.g. an
+        # access log), without holding more than one line in memory.
+        search = _HREF.search
+        verify = self.verify
+        for line in lines:
+            match = search(line)
+            if match is not None:
+                url = match.group(0)
+                yield url, verify(url)
+
+
+def verify_href(url: str, secret: str) -> bool:
+    return FlyyerVerifier(secret).verify(url)
+
+
+def count_forged(lines: Iterable[str], secret: str) -> Tuple[int, int]:
+    # `(valid, forged)` totals for the Flyyer URLs found in `lines`.
+    valid = forged = 0
+    for _, ok in FlyyerVerifier(secret).verify_lines(lines):
+        if ok:
+            valid += 1
+        else:
+            forged += 1
+    return valid, forged
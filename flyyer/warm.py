@@ -0,0 +1,224 @@
+import asyncio
+from collections import defaultdict
+from ssl import create_default_context
+from time import perf_counter
+from typing import Any, Dict, Iterable, Optional, Tuple
+from urllib.parse import urlsplit
+
+from flyyer.stats import percentile
+
+# Statuses worth retrying: the CDN is busy or the render failed upstream.
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+
+
+class WarmReport:
+    def __init__(self):
+        self.requests = 0
+        self.retries = 0
+        self.errors = 0
+        self.statuses = defaultdict(int)
+        self.latencies = []  # seconds, one per finished request
+        self.elapsed = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        ordered = sorted(self.latencies)
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "errors": self.errors,
+            "statuses": dict(self.statuses),
+            "elapsed": self.elapsed,
+            "rate": self.requests / self.elapsed if self.elapsed else 0.0,
+            "p50": percentile(ordered, 0.50),
+            "p90": percentile(ordered, 0.90),
+            "p99": percentile(ordered, 0.99),
+            "max": ordered[-1] if ordered else 0.0,
+        }
+
+
+class _Response:
+    def __init__(self, status: int, keep_alive: bool):
+        self.status = status
+        self.keep_alive = keep_alive
+
+
+class CDNWarmer:
+    # Requests every href once so the CDN renders and caches it before real
+    # crawlers arrive. Connections are kept alive and reused per host.
+    def __init__(
+        self,
+        concurrency: int = 16,
+        method: str = "HEAD",
+        retries: int = 2,
+        backoff: float = 0.5,
+        rate_limit: Optional[float] = None,
+        timeout: float = 30.0,
+        base_url: Optional[str] = None,
+        user_agent: str = "flyyer-warmer",
+    ):
+        if concurrency < 1:
+            raise Exception("Invalid `concurrency`. It must be at least 1.")
+        self.concurrency = concurrency
+        self.method = method.upper()
+        self.retries = retries
+        self.backoff = backoff
+        self.rate_limit = rate_limit  # requests per second per host
+        self.timeout = timeout
+        self.base_url = urlsplit(base_url) if base_url else None
+        self.user_agent = user_agent
+        self._idle = defaultdict(list)
+        self._next_slot = {}
+        self._ssl = None
+
+    def _target(self, item: Any) -> Tuple[str, str, int, str]:
+        href = item if isinstance(item, str) else item.href()
+        url = urlsplit(href)
+        if self.base_url:
+            # Only the origin is replaced, the signed path and query are kept.
+            url = url._replace(scheme=self.base_url.scheme, netloc=self.base_url.netloc)
+        port = url.port or (443 if url.scheme == "https" else 80)
+        target = url.path + ("?" + url.query if url.query else "")
+        return url.scheme, url.hostname, port, target
+
+    async def _throttle(self, host: str):
+        if not self.rate_limit:
+            return
+        loop = asyncio.get_event_loop()
+        now = loop.time()
+        slot = max(now, self._next_slot.get(host, now))
+        self._next_slot[host] = slot + 1.0 / self.rate_limit
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    async def _connect(self, scheme: str, host: str, port: int):
+        idle = self._idle[(scheme, host, port)]
+        while idle:
+            reader, writer = idle.pop()
+            if not reader.at_eof():
+                return reader, writer
+            writer.close()
+        ssl = None
+        if scheme == "https":
+            if self._ssl is None:
+                self._ssl = create_default_context()
+            ssl = self._ssl
+        return await asyncio.open_connection(host, port, ssl=ssl)
+
+    async def _request(self, reader, writer, host: str, port: int, target: str) -> _Response:
+        default_port = port in (80, 443)
+        head = (
+            f"{self.method} {target} HTTP/1.1\r\n"
+            f"Host: {host if default_port else f'{host}:{port}'}\r\n"
+            f"User-Agent: {self.user_agent}\r\n"
+            "Accept: */*\r\n"
+            "Connection: keep-alive\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1"))
+        await writer.drain()
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionError("Connection closed before the response")
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        keep_alive = headers.get("connection", "").lower() != "close"
+        if self.method == "HEAD" or status in (204, 304) or 100 <= status < 200:
+            return _Response(status, keep_alive)
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                await reader.readexactly(size + 2)
+                if size == 0:
+                    break
+        elif "content-length" in headers:
+            await reader.readexactly(int(headers["content-length"]))
+        else:
+            await reader.read()
+            keep_alive = False
+        return _Response(status, keep_alive)
+
+    async def _fetch(self, item: Any, report: WarmReport):
+        # Never raises: one bad page must not abort the whole run. Pages whose
+        # href cannot be built count as errors without a request.
+        try:
+            scheme, host, port, target = self._target(item)
+        except Exception:
+            report.errors += 1
+            return
+        attempt = 0
+        while True:
+            await self._throttle(host)
+            start = perf_counter()
+            status = None
+            try:
+                # Connecting and the request each get `timeout`: unreachable
+                # hosts must not hold a worker for the OS connect timeout.
+                reader, writer = await asyncio.wait_for(
+                    self._connect(scheme, host, port), self.timeout
+                )
+                try:
+                    response = await asyncio.wait_for(
+                        self._request(reader, writer, host, port, target), self.timeout
+                    )
+                except BaseException:
+                    writer.close()
+                    raise
+                status = response.status
+                if response.keep_alive and len(self._idle[(scheme, host, port)]) < self.concurrency:
+                    self._idle[(scheme, host, port)].append((reader, writer))
+                else:
+                    writer.close()
+            except asyncio.CancelledError:  # an `Exception` before Python 3.8
+                raise
+            except Exception:  # network errors, timeouts and malformed responses
+                status = None
+            if (status is None or status in RETRY_STATUSES) and attempt < self.retries:
+                report.retries += 1
+                await asyncio.sleep(self.backoff * 2 ** attempt)
+                attempt += 1
+                continue
+            report.requests += 1
+            report.latencies.append(perf_counter() - start)
+            if status is None:
+                report.errors += 1
+            else:
+                report.statuses[status] += 1
+            return
+
+    async def warm(self, items: Iterable[Any]) -> WarmReport:
+        # `items` are hrefs or objects with an `href()` method (Flyyer,
+        # FlyyerRender, prepared pages) and are consumed lazily.
+        report = WarmReport()
+        iterator = iter(items)
+        start = perf_counter()
+
+        async def worker():
+            for item in iterator:
+                await self._fetch(item, report)
+
+        try:
+            await asyncio.gather(*[worker() for _ in range(self.concurrency)])
+        finally:
+            self.close()
+            report.elapsed = perf_counter() - start
+        return report
+
+    def close(self):
+        for connections in self._idle.values():
+            for _, writer in connections:
+                writer.close()
+        self._idle.clear()
+
+
+def warm(items: Iterable[Any], **options) -> WarmReport:
+    # Blocking helper for scripts: runs `CDNWarmer(**options).warm(items)` on a new event loop.
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(CDNWarmer(**options).warm(items))
+    finally:
+        loop.close()
@@ -0,0 +1,42 @@
+from typing import Any, Iterable, List, Mapping, Optional, Union
+
+from flyyer.flyyer import (
+    Flyyer,
+    FlyyerRender,
+    PreparedFlyyer,
+    PreparedFlyyerRender,
+    _href_many,
+)
+
+# Process-pool helpers: install a builder once per worker process, e.g.
+# `multiprocessing.Pool(initializer=install, initargs=(builder,))`, and submit
+# tasks that carry only per-page data. Prepared builders pickle as config and
+# share one derived state (and signer) per process.
+_builders = {}
+
+
+def install(builder: Union[Flyyer, FlyyerRender, PreparedFlyyer, PreparedFlyyerRender], name: str = "default"):
+    if isinstance(builder, (Flyyer, FlyyerRender)):
+        builder = builder.prepare()
+    _builders[name] = builder
+
+
+def installed(name: str = "default") -> Union[PreparedFlyyer, PreparedFlyyerRender]:
+    try:
+        return _builders[name]
+    except KeyError:
+        raise Exception(f"Missing builder `{name}`. Call `install()` in the worker initializer.")
+
+
+def href_page(path: str, variables: Optional[Mapping[Any, Any]] = None, name: str = "default") -> str:
+    return installed(name).with_page(path, variables).href()
+
+
+def href_render(variables: Optional[Mapping[Any, Any]] = None, name: str = "default") -> str:
+    return installed(name).with_variables(variables).href()
+
+
+def href_many(items: Iterable[Any], name: str = "default") -> List[str]:
+    # Like `Flyyer.href_many` (`(path, variables)` items) or
+    # `FlyyerRender.href_many` (`variables` items) for the installed builder.
+    return _href_many(installed(name), items)
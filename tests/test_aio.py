@@ -0,0 +1,78 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import get_context
+import sys
+
+import pytest
+
+from flyyer import Flyyer, FlyyerRender
+from flyyer.aio import ahref_many
+
+KEY = "sg1j0HVy9bsMihJqa8Qwu8ZYgCYHG0tx"
+
+
+def process_pool(workers):
+    # `mp_context` is new in Python 3.7, older versions fork.
+    if sys.version_info < (3, 7):
+        return ProcessPoolExecutor(workers)
+    return ProcessPoolExecutor(workers, mp_context=get_context("spawn"))
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def test_ahref_many_matches_href_many():
+    flyyer = Flyyer(project="project", secret=KEY, strategy="HMAC", meta={"v": "1"})
+    items = [(f"/p/{i}", {"i": i}) for i in range(100)] + [("", None)]
+    assert run(flyyer.ahref_many(items)) == flyyer.href_many(items)
+    assert run(ahref_many(flyyer.prepare(), items)) == flyyer.href_many(items)
+    render = FlyyerRender(tenant="t", deck="d", template="x", meta={"v": "1"})
+    variables = [{"i": i} for i in range(50)] + [None]
+    assert run(render.ahref_many(variables)) == render.href_many(variables)
+
+
+def test_ahref_many_yields_to_the_event_loop():
+    flyyer = Flyyer(project="project", meta={"v": "1"})
+    items = [(f"/p/{i}", {"i": i}) for i in range(200)]
+    done = []
+    ticks = []
+
+    async def ticker():
+        for _ in range(5):
+            ticks.append(bool(done))
+            await asyncio.sleep(0)
+
+    async def batch():
+        hrefs = await flyyer.ahref_many(items, slice_time=0)
+        done.append(True)
+        return hrefs
+
+    async def main():
+        return (await asyncio.gather(batch(), ticker()))[0]
+
+    assert run(main()) == flyyer.href_many(items)
+    # The ticker ran while the batch was still in progress.
+    assert ticks[:3] == [False, False, False]
+
+
+@pytest.mark.parametrize("strategy", [None, "HMAC", "JWT"])
+def test_ahref_many_with_executors(strategy):
+    flyyer = Flyyer(project="project", secret=KEY if strategy else None, strategy=strategy, meta={"v": "1"})
+    items = [(f"/p/{i}", {"i": i}) for i in range(50)]
+    with ThreadPoolExecutor(2) as executor:
+        assert run(flyyer.ahref_many(items, executor=executor, chunk_size=7, concurrency=2)) == flyyer.href_many(items)
+    with process_pool(2) as executor:
+        assert run(flyyer.ahref_many(items, executor=executor, chunk_size=16)) == flyyer.href_many(items)
+    with pytest.raises(Exception, match="Invalid `concurrency`"):
+        run(flyyer.ahref_many(items, executor=ThreadPoolExecutor(1), concurrency=0))
+
+
+def test_ahref_many_checks_concurrency_inline():
+    flyyer = Flyyer(project="project", meta={"v": "1"})
+    with pytest.raises(Exception, match="Invalid `concurrency`"):
+        run(flyyer.ahref_many([("/a", {})], concurrency=0))
@@ -0,0 +1,38 @@
+import pytest
+
+from benchmarks import bench
+
+
+def test_benchmark_cases_run():
+    for name, (fn, ops) in bench._cases().items():
+        assert ops >= 1
+        assert fn() is not None, name
+
+
+def test_compare_flags_regressions(capsys):
+    baseline = {"calibration": 100.0, "a": 1000.0, "b": 1000.0}
+    # Twice as fast a machine: `a` kept pace, `b` did not.
+    results = {"calibration": 200.0, "a": 2000.0, "b": 1000.0}
+    assert bench.compare(results, baseline, threshold=0.25) == ["b"]
+    assert "REGRESSION" in capsys.readouterr().out
+
+
+def test_compare_ab_flags_regressions(capsys):
+    results = {"a": (900.0, 1000.0, 0.9), "b": (500.0, 1000.0, 0.5)}
+    assert bench.compare_ab(results, threshold=0.25) == ["b"]
+    assert "REGRESSION" in capsys.readouterr().out
+
+
+def test_ab_measures_both_sides():
+    # A source tree works as the reference, as does any git ref.
+    results = bench.ab(bench.ROOT, ["to_query.flat"], rounds=1, min_time=0.01)
+    assert list(results) == ["to_query.flat"]
+    ops, reference_ops, ratio = results["to_query.flat"]
+    assert ops > 0 and reference_ops > 0 and ratio > 0
+
+
+def test_ab_reports_dead_workers(tmp_path):
+    (tmp_path / "flyyer").mkdir()
+    (tmp_path / "flyyer" / "__init__.py").write_text("raise ImportError('broken build')\n")
+    with pytest.raises(Exception, match="exited with code 1"):
+        bench.ab(str(tmp_path), rounds=1, min_time=0.01)
@@ -0,0 +1,161 @@
+import pytest
+
+from flyyer import CacheInfo, Flyyer, FlyyerClock, FlyyerMeta, FlyyerRender, HrefCache, fingerprint
+
+
+class FakeTimer:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_cache_hit_skips_href(monkeypatch):
+    cache = HrefCache(maxsize=4)
+    flyyer = Flyyer(project="project", path="/a", variables={"title": "A"}, meta=FlyyerMeta(v="1"))
+    href = cache.href(flyyer)
+    assert href == flyyer.href()
+
+    def fail():
+        raise AssertionError("href should not be called on a hit")
+
+    same = Flyyer(project="project", path="/a", variables={"title": "A"}, meta=FlyyerMeta(v="1"))
+    monkeypatch.setattr(same, "href", fail)
+    assert cache.href(same) == href
+    info = cache.info()
+    assert (info.hits, info.misses, info.evictions, info.size) == (1, 1, 0, 1)
+
+
+def test_cache_lru_eviction():
+    cache = HrefCache(maxsize=2)
+    pages = [Flyyer(project="project", path=f"/{i}", meta=FlyyerMeta(v="1")) for i in range(3)]
+    cache.href(pages[0])
+    cache.href(pages[1])
+    cache.href(pages[0])  # refresh, so /1 is the least recently used
+    cache.href(pages[2])
+    info = cache.info()
+    assert (info.size, info.evictions) == (2, 1)
+    cache.href(pages[0])
+    assert cache.info().hits == 2
+    cache.href(pages[1])
+    assert cache.info().misses == 4
+
+
+def test_cache_ttl_only_for_generated_v():
+    timer = FakeTimer()
+    cache = HrefCache(ttl=10, timer=timer)
+    generated = Flyyer(project="project", path="/a")
+    pinned = Flyyer(project="project", path="/b", meta=FlyyerMeta(v="1"))
+    cache.href(generated)
+    cache.href(pinned)
+    timer.now += 11
+    cache.href(generated)
+    cache.href(pinned)
+    info = cache.info()
+    assert (info.hits, info.misses) == (1, 3)
+
+
+def test_fingerprint_is_stable_and_distinguishes():
+    a = FlyyerRender(tenant="t", deck="d", template="x", variables={"a": 1, "b": [1]})
+    b = FlyyerRender(tenant="t", deck="d", template="x", variables={"a": 1, "b": [1]})
+    c = FlyyerRender(tenant="t", deck="d", template="x", variables={"b": [1], "a": 1})
+    assert fingerprint(a) == fingerprint(b)
+    assert fingerprint(a) != fingerprint(c)
+    hmac = Flyyer(project="p", secret="s1", strategy="HMAC")
+    other = Flyyer(project="p", secret="s2", strategy="HMAC")
+    assert fingerprint(hmac) != fingerprint(other)
+
+
+
+def test_fingerprint_keeps_types_apart(tmp_path):
+    from flyyer import SQLiteHrefCache
+
+    pages = [
+        Flyyer(project="p", variables=variables, meta={"v": "1"})
+        for variables in [{True: "x"}, {"true": "x"}, {1: "x"}, {"1": "x"}, {b"k": 1}, {(1, 2): 1}]
+    ]
+    assert len({fingerprint(page) for page in pages}) == len(pages)
+    for cache in [HrefCache(), SQLiteHrefCache(str(tmp_path / "hrefs.sqlite"))]:
+        assert [cache.href(page) for page in pages] == [page.href() for page in pages]
+
+def test_cache_prepared_builders_and_clock_buckets():
+    cache = HrefCache()
+    render = FlyyerRender(tenant="t", deck="d", template="x", variables={"a": 1}, meta={"v": "1"})
+    assert cache.href(render.prepare()) == render.href()
+    assert cache.href(render) == render.href()
+    assert cache.info().hits == 1
+    flyyer = Flyyer(project="project", path="/a", meta={"v": "1"})
+    assert cache.href(flyyer.prepare()) == cache.href(flyyer) == flyyer.href()
+    minute = Flyyer(project="project", path="/a", clock=FlyyerClock(bucket=60, now=lambda: 100))
+    hour = Flyyer(project="project", path="/a", clock=FlyyerClock(bucket=3600, now=lambda: 100))
+    assert fingerprint(minute) != fingerprint(hour)
+    assert cache.href(minute) == minute.href()
+    assert cache.href(hour) == hour.href()
+    with pytest.raises(Exception, match="Invalid `flyyer`"):
+        cache.href("https://cdn.flyyer.io/v2/project/_/__v=1/")
+
+
+def _fill_sqlite_cache(path):
+    from flyyer import SQLiteHrefCache
+
+    SQLiteHrefCache(path).href(Flyyer(project="project", path="/shared", meta=FlyyerMeta(v="1")))
+
+
+def test_sqlite_cache_shared_across_processes(tmp_path, monkeypatch):
+    from multiprocessing import get_context
+    from flyyer import SQLiteHrefCache
+
+    path = str(tmp_path / "hrefs.sqlite")
+    process = get_context("spawn").Process(target=_fill_sqlite_cache, args=(path,))
+    process.start()
+    process.join(30)
+    assert process.exitcode == 0
+
+    flyyer = Flyyer(project="project", path="/shared", meta=FlyyerMeta(v="1"))
+    expected = flyyer.href()
+    monkeypatch.setattr(flyyer, "href", lambda: pytest.fail("href should not be called on a hit"))
+    cache = SQLiteHrefCache(path)
+    assert cache.href(flyyer) == expected
+    assert cache.info() == CacheInfo(1, 0, 0, 1, 100000)
+
+
+def test_sqlite_cache_expiry_and_eviction(tmp_path):
+    from flyyer import SQLiteHrefCache
+
+    timer = FakeTimer()
+    cache = SQLiteHrefCache(str(tmp_path / "hrefs.sqlite"), maxsize=2, ttl=10, timer=timer)
+    generated = Flyyer(project="project", path="/a")
+    cache.href(generated)
+    cache.href(generated)
+    timer.now += 11
+    cache.href(generated)
+    assert (cache.hits, cache.misses) == (1, 2)
+    for i in range(3):
+        cache.href(Flyyer(project="project", path=f"/{i}", meta=FlyyerMeta(v="1")))
+    info = cache.info()
+    assert (info.size, info.evictions) == (2, 2)
+    cache.clear()
+    assert len(cache) == 0
+    cache.close()
+
+
+def test_sqlite_cache_rewrites_do_not_evict_live_entries(tmp_path):
+    from flyyer import SQLiteHrefCache
+
+    timer = FakeTimer()
+    path = str(tmp_path / "hrefs.sqlite")
+    cache = SQLiteHrefCache(path, maxsize=3, ttl=10, timer=timer)
+    for i in range(2):
+        cache.href(Flyyer(project="project", path=f"/pinned/{i}", meta=FlyyerMeta(v="1")))
+    generated = Flyyer(project="project", path="/generated")
+    for _ in range(3):
+        cache.href(generated)
+        timer.now += 11
+    assert (len(cache), cache.evictions, cache.misses) == (3, 0, 5)
+    # The count is shared by every connection to the file.
+    other = SQLiteHrefCache(path, maxsize=3)
+    other.href(Flyyer(project="project", path="/new", meta=FlyyerMeta(v="1")))
+    assert (len(other), len(cache), other.evictions) == (3, 3, 1)
+    cache.close()
+    other.close()
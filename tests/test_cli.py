@@ -0,0 +1,79 @@
+from io import StringIO
+from json import dumps
+
+from flyyer import Flyyer, FlyyerMeta, FlyyerRender
+from flyyer.cli import main, run
+
+KEY = "sg1j0HVy9bsMihJqa8Qwu8ZYgCYHG0tx"
+
+
+def test_cli_jsonl_in_order(tmp_path, capsys):
+    records = [
+        {"path": f"/products/{i}", "variables": {"title": f"Product {i}"}, "meta": {"v": "1"}}
+        for i in range(25)
+    ]
+    source = tmp_path / "records.jsonl"
+    source.write_text("\n".join(dumps(record) for record in records) + "\n")
+    output = tmp_path / "urls.txt"
+    argv = [str(source), "-o", str(output), "--project", "project", "--strategy", "HMAC"]
+    assert main(argv + ["--secret", KEY, "-j", "2", "--chunk-size", "4", "--max-pending", "1"]) == 0
+    expected = [
+        Flyyer(
+            project="project",
+            path=record["path"],
+            secret=KEY,
+            strategy="HMAC",
+            variables=record["variables"],
+            meta=record["meta"],
+        ).href()
+        for record in records
+    ]
+    assert output.read_text().splitlines() == expected
+    assert "25 URLs in" in capsys.readouterr().err
+
+
+def test_cli_csv_render(tmp_path, monkeypatch):
+    source = tmp_path / "records.csv"
+    source.write_text('variables,meta\n"{""title"": ""A, B""}","{""v"": 2}"\n,\n')
+    output = tmp_path / "urls.txt"
+    monkeypatch.setenv("FLYYER_SECRET", KEY)
+    argv = [str(source), "-o", str(output), "--tenant", "t", "--deck", "d", "--template", "x"]
+    assert main(argv + ["--strategy", "HMAC", "-j", "1"]) == 0
+    first, second = output.read_text().splitlines()
+    assert first == FlyyerRender(
+        tenant="t",
+        deck="d",
+        template="x",
+        variables={"title": "A, B"},
+        meta=FlyyerMeta(v=2),
+        secret=KEY,
+        strategy="HMAC",
+    ).href()
+    assert second.startswith("https://cdn.flyyer.io/render/v2/t/d/x?__v=")
+
+
+def test_cli_csv_default_falls_back_to_option(tmp_path):
+    source = tmp_path / "records.csv"
+    source.write_text('path,meta,default\n/a,"{""v"": 1}",\n/b,"{""v"": 1}",/own.png\n')
+    output = tmp_path / "urls.txt"
+    assert main([str(source), "-o", str(output), "--project", "p", "--default", "/d.png", "-j", "1"]) == 0
+    assert output.read_text().splitlines() == [
+        "https://cdn.flyyer.io/v2/p/_/__v=1&_def=%2Fd.png/a",
+        "https://cdn.flyyer.io/v2/p/_/__v=1&_def=%2Fown.png/b",
+    ]
+
+
+def test_run_inline_counts():
+    output = StringIO()
+    records = ['{"path": "/a", "meta": {"v": 1}}', '{"meta": {"v": 1}}']
+    assert run({"project": "project"}, records, output) == 2
+    assert output.getvalue() == "https://cdn.flyyer.io/v2/project/_/__v=1/a\nhttps://cdn.flyyer.io/v2/project/_/__v=1/\n"
+
+
+def test_cli_offset_resumes_and_appends(tmp_path):
+    source = tmp_path / "records.jsonl"
+    source.write_text("".join(dumps({"path": f"/{i}", "meta": {"v": "1"}}) + "\n" for i in range(5)))
+    output = tmp_path / "urls.txt"
+    output.write_text("https://cdn.flyyer.io/v2/project/_/__v=1/0\n")
+    assert main([str(source), "-o", str(output), "--project", "project", "-j", "1", "--offset", "1"]) == 0
+    assert output.read_text().splitlines() == [f"https://cdn.flyyer.io/v2/project/_/__v=1/{i}" for i in range(5)]
@@ -0,0 +1,54 @@
+from re import search
+
+from flyyer import Flyyer, FlyyerClock, FlyyerMeta, FlyyerRender, HrefCache
+
+
+class FakeNow:
+    def __init__(self, now=7200.5):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_clock_default_bucket_is_seconds():
+    now = FakeNow(1618281823.9)
+    assert FlyyerClock(now=now).v() == "1618281823"
+
+
+def test_clock_bucket_collapses_window():
+    now = FakeNow(7200)
+    clock = FlyyerClock(bucket=3600, now=now)
+    assert clock.v() == "7200"
+    now.now = 10799
+    assert clock.v() == "7200"
+    now.now = 10800
+    assert clock.v() == "10800"
+
+
+def test_clock_used_by_flyyer_and_render():
+    clock = FlyyerClock(bucket=3600, now=FakeNow(7300))
+    flyyer = Flyyer(project="project", path="/a", clock=clock)
+    assert search(r"__v=(\d+)", flyyer.href()).group(1) == "7200"
+    jwt = Flyyer(
+        project="project", secret="sg1j0HVy9bsMihJqa8Qwu8ZYgCYHG0tx", strategy="JWT", clock=clock
+    )
+    assert jwt.href().endswith("?__v=7200")
+    render = FlyyerRender(tenant="t", deck="d", template="x", clock=clock)
+    assert render.href() == "https://cdn.flyyer.io/render/v2/t/d/x?__v=7200"
+    pinned = Flyyer(project="project", meta=FlyyerMeta(v="1"), clock=clock)
+    assert "__v=1/" in pinned.href()
+
+
+def test_cache_without_ttl_follows_clock():
+    now = FakeNow(7200)
+    clock = FlyyerClock(bucket=3600, now=now)
+    cache = HrefCache(ttl=None)
+    flyyer = Flyyer(project="project", path="/a", clock=clock)
+    first = cache.href(flyyer)
+    now.now = 10000
+    assert cache.href(flyyer) == first
+    now.now = 10800
+    assert cache.href(flyyer) != first
+    info = cache.info()
+    assert (info.hits, info.misses) == (1, 2)
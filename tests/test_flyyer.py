@@ -4,7 +4,7 @@ import jwt
 import pytest
 
 
-from flyyer import __version__, FlyyerMeta, to_query, Flyyer, FlyyerRender
+from flyyer import __version__, FlyyerMeta, to_query, Flyyer, FlyyerRender, PreparedFlyyer, from_hrefs
 
 
 def test_version():
@@ -445,3 +445,225 @@ def test_flyyer_wrong_jwt_key_throws():
     token = search(r"(.*)(jwt-)(.*)(\?__v=\d+)", href).groups(2)[2]
     assert jwt.decode(token, key1, algorithms=["HS256"])
     pytest.raises(jwt.exceptions.InvalidSignatureError, jwt.decode, *[token, key2], algorithms=["HS256"])
+
+
+def test_flyyer_href_many_matches_href():
+    key = "sg1j0HVy9bsMihJqa8Qwu8ZYgCYHG0tx"
+    items = [
+        ("/", None),
+        ("path/to/product", {"title": "Hello world!"}),
+        ("/collections/col?sort=price", {"title": "Col", "_w": 300, "tags": ["a", "b"]}),
+    ]
+    meta = FlyyerMeta(v="123", id="jeans-123", width=100)
+    for strategy, secret in [(None, None), ("HMAC", key), ("JWT", key)]:
+        flyyer = Flyyer(
+            project="project", secret=secret, strategy=strategy, meta=meta, default="/logo.png"
+        )
+        expected = [
+            Flyyer(
+                project="project",
+                path=path,
+                variables=variables,
+                secret=secret,
+                strategy=strategy,
+                meta=meta,
+                default="/logo.png",
+            ).href()
+            for path, variables in items
+        ]
+        assert flyyer.href_many(items) == expected
+
+
+def test_flyyer_render_href_many_matches_href():
+    key = "sg1j0HVy9bsMihJqa8Qwu8ZYgCYHG0tx"
+    items = [None, {"title": "Hello world!"}, {"title": "Other", "_w": 1, "nested": {"a": [1, 2]}}]
+    meta = FlyyerMeta(v="123", agent="whatsapp")
+    for strategy, secret in [(None, None), ("HMAC", key), ("JWT", key)]:
+        render = FlyyerRender(
+            tenant="tenant",
+            deck="deck",
+            template="template",
+            extension="jpeg",
+            secret=secret,
+            strategy=strategy,
+            meta=meta,
+        )
+        expected = [
+            FlyyerRender(
+                tenant="tenant",
+                deck="deck",
+                template="template",
+                extension="jpeg",
+                variables=variables,
+                secret=secret,
+                strategy=strategy,
+                meta=meta,
+            ).href()
+            for variables in items
+        ]
+        assert render.href_many(items) == expected
+
+
+def test_prepared_flyyer_matches_href():
+    key = "sg1j0HVy9bsMihJqa8Qwu8ZYgCYHG0tx"
+    meta = FlyyerMeta(v="123", id="jeans-123", width=100)
+    for strategy, secret in [(None, None), ("HMAC", key), ("JWT", key)]:
+        flyyer = Flyyer(project="project", secret=secret, strategy=strategy, meta=meta)
+        prepared = flyyer.prepare()
+        assert isinstance(prepared, PreparedFlyyer)
+        assert prepared.href() == flyyer.href()
+        page = prepared.with_path("products/1").with_variables({"title": "Hello world!", "_w": 3})
+        expected = Flyyer(
+            project="project",
+            path="/products/1",
+            secret=secret,
+            strategy=strategy,
+            meta=meta,
+            variables={"title": "Hello world!", "_w": 3},
+        )
+        assert page.path == "/products/1"
+        assert page.href() == expected.href() == str(page)
+        assert prepared.with_page("/products/1", {"title": "Hello world!", "_w": 3}).href() == page.href()
+
+
+def test_prepared_flyyer_render_matches_href():
+    key = "sg1j0HVy9bsMihJqa8Qwu8ZYgCYHG0tx"
+    meta = FlyyerMeta(v="123", agent="whatsapp")
+    for strategy, secret in [(None, None), ("HMAC", key), ("JWT", key)]:
+        render = FlyyerRender(
+            tenant="tenant",
+            deck="deck",
+            template="template",
+            extension="jpeg",
+            secret=secret,
+            strategy=strategy,
+            meta=meta,
+        )
+        prepared = render.prepare()
+        for variables in [{"title": "Hello world!"}, {"_ua": "twitter", "items": [1, 2]}]:
+            expected = FlyyerRender(
+                tenant="tenant",
+                deck="deck",
+                template="template",
+                extension="jpeg",
+                variables=variables,
+                secret=secret,
+                strategy=strategy,
+                meta=meta,
+            )
+            assert prepared.with_variables(variables).href() == expected.href()
+
+
+def test_prepared_is_immutable_and_isolated():
+    meta = {"v": "1", "id": "a"}
+    prepared = Flyyer(project="project", meta=meta).prepare()
+    with pytest.raises(AttributeError):
+        prepared.path = "/other"
+    with pytest.raises(AttributeError):
+        prepared.anything = 1
+    meta["id"] = "b"
+    assert "__id=a" in prepared.href()
+    render = FlyyerRender(tenant="t", deck="d", template="x").prepare()
+    with pytest.raises(AttributeError):
+        render.variables = {}
+    # Reading fields never exposes the shared state.
+    prepared.meta["v"] = "2"
+    prepared.with_variables({"a": 1}).variables["a"] = 2
+    assert prepared.meta == {"v": "1", "id": "a"}
+    assert prepared.with_page("/b", {"a": 1}).href() == "https://cdn.flyyer.io/v2/project/_/__id=a&__v=1&a=1/b"
+
+
+def test_prepared_strategy_is_the_given_one():
+    key = "sg1j0HVy9bsMihJqa8Qwu8ZYgCYHG0tx"
+    for strategy in [None, "HMAC", "jwt"]:
+        secret = key if strategy else None
+        flyyer = Flyyer(project="project", secret=secret, strategy=strategy)
+        render = FlyyerRender(tenant="t", deck="d", template="x", secret=secret, strategy=strategy)
+        assert flyyer.prepare().strategy == render.prepare().strategy == strategy
+
+
+def test_flyyer_from_href_round_trip():
+    key = "sg1j0HVy9bsMihJqa8Qwu8ZYgCYHG0tx"
+    for strategy, secret in [(None, None), ("HMAC", key), ("JWT", key)]:
+        flyyer = Flyyer(
+            project="project",
+            path="/collections/col?sort=price",
+            secret=secret,
+            strategy=strategy,
+            variables={"title": "Hello world!", "tags": ["a", "b"], "price": {"amount": "10"}},
+            meta=FlyyerMeta(id="jeans-123", width=100, agent="whatsapp"),
+            default="/logo.png",
+        )
+        href = flyyer.href()
+        parsed = Flyyer.from_href(href, secret)
+        assert parsed.href() == href
+        assert parsed.project == "project"
+        assert parsed.path == "/collections/col?sort=price"
+        assert parsed.default == "/logo.png"
+        assert parsed.variables["tags"] == ["a", "b"]
+        assert parsed.meta["id"] == "jeans-123"
+    unsigned = Flyyer.from_href(Flyyer(project="p", secret=key, strategy="HMAC").href())
+    assert unsigned.strategy is None
+    with pytest.raises(Exception):
+        Flyyer.from_href("https://example.com/")
+
+
+def test_flyyer_render_from_href_round_trip():
+    key = "sg1j0HVy9bsMihJqa8Qwu8ZYgCYHG0tx"
+    for strategy, secret in [(None, None), ("HMAC", key), ("JWT", key)]:
+        for version, extension in [(None, None), ("3", None), (None, "png"), ("3", "png")]:
+            render = FlyyerRender(
+                tenant="tenant",
+                deck="deck",
+                template="template",
+                version=version,
+                extension=extension,
+                variables={"title": "Hello world!", "items": [{"text": "Oranges", "count": "12"}]},
+                meta=FlyyerMeta(agent="whatsapp", height=200),
+                secret=secret,
+                strategy=strategy,
+            )
+            href = render.href()
+            parsed = FlyyerRender.from_href(href, secret)
+            assert parsed.href() == href
+            assert (parsed.deck, parsed.template) == ("deck", "template")
+            assert (parsed.version, parsed.extension) == (version, extension)
+            assert parsed.variables["items"] == [{"text": "Oranges", "count": "12"}]
+
+
+def test_from_hrefs_streams_log_lines():
+    flyyer = Flyyer(project="project", path="/a", meta=FlyyerMeta(v="1"))
+    render = FlyyerRender(tenant="t", deck="d", template="x", meta=FlyyerMeta(v="1"))
+    lines = [
+        f"GET {flyyer.href()} 200",
+        "GET /favicon.ico 404",
+        f'"{render.href()}"',
+        "GET /v2/broken 200",
+    ]
+    parsed = list(from_hrefs(lines))
+    assert [type(item) for item in parsed] == [Flyyer, FlyyerRender]
+    assert [item.href() for item in parsed] == [flyyer.href(), render.href()]
+
+
+def test_href_bytes_and_write_href():
+    from io import BytesIO
+
+    key = "sg1j0HVy9bsMihJqa8Qwu8ZYgCYHG0tx"
+    objects = [
+        Flyyer(project="project", path="/ñandú", variables={"title": "Hello world!"}),
+        Flyyer(project="project", path="/a", secret=key, strategy="HMAC", meta={"v": "1"}),
+        Flyyer(project="project", path="/a", secret=key, strategy="JWT", meta={"v": "1"}),
+        FlyyerRender(tenant="t", deck="d", template="x", variables={"a": [1, 2]}, meta={"v": "1"}),
+        FlyyerRender(tenant="t", deck="d", template="x", secret=key, strategy="HMAC", meta={"v": "1"}),
+        FlyyerRender(tenant="t", deck="d", template="x", variables={"_w": 5}, meta={"v": "1"}),
+    ]
+    for flyyer in objects:
+        for obj in [flyyer, flyyer.prepare()]:
+            expected = obj.href().encode("utf-8")
+            assert obj.href_bytes() == expected
+            buffer = bytearray(b"<meta content=\"")
+            assert obj.write_href(buffer) == len(expected)
+            assert bytes(buffer) == b"<meta content=\"" + expected
+            stream = BytesIO()
+            obj.write_href(stream)
+            assert stream.getvalue() == expected
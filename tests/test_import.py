@@ -0,0 +1,47 @@
+from os import environ
+from re import search
+import subprocess
+import sys
+
+import pytest
+
+# Generous on purpose: this guards against pulling heavy modules back in at
+# import time, not against machine-to-machine noise.
+IMPORT_BUDGET_MS = float(environ.get("FLYYER_IMPORT_BUDGET_MS", "250"))
+
+
+def _run(code, *flags):
+    return subprocess.run(
+        [sys.executable, *flags, "-c", code],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+
+
+def test_import_does_not_load_optional_dependencies():
+    code = "import sys, flyyer; print(','.join(m for m in ('jwt', 'typing_extensions', 'asyncio', 'concurrent.futures') if m in sys.modules))"
+    assert _run(code).stdout.strip() == ""
+
+
+def test_jwt_loaded_on_first_pyjwt_use():
+    code = (
+        "import sys, flyyer\n"
+        "flyyer.JWTSigner('sg1j0HVy9bsMihJqa8Qwu8ZYgCYHG0tx').encode({})\n"
+        "assert 'jwt' not in sys.modules\n"
+        "flyyer.JWTSigner('sg1j0HVy9bsMihJqa8Qwu8ZYgCYHG0tx', native=False).encode({})\n"
+        "assert 'jwt' in sys.modules\n"
+    )
+    _run(code)
+
+
+@pytest.mark.skipif(sys.version_info < (3, 7), reason="`-X importtime` is new in Python 3.7")
+def test_import_time_budget():
+    # Best of a few cold interpreters, as reported by `python -X importtime`.
+    timings = []
+    for _ in range(3):
+        stderr = _run("import flyyer", "-X", "importtime").stderr
+        cumulative = search(r"\|\s*(\d+)\s*\|\s*flyyer\n", stderr).group(1)
+        timings.append(int(cumulative) / 1000)
+    assert min(timings) < IMPORT_BUDGET_MS
@@ -0,0 +1,60 @@
+from urllib.parse import quote_plus, unquote
+
+from flyyer.query import decode_pairs, encode_pairs, sorted_query
+
+
+def test_encode_pairs_nested():
+    data = {
+        "crumbs": [{"name": "Home", "url": "/"}, {"name": "Shop & co"}],
+        "tiers": [[1, 2], []],
+        "skip": None,
+        "on": True,
+    }
+    pairs = encode_pairs(data)
+    assert [unquote(pair) for pair in pairs] == [
+        "crumbs[0][name]=Home",
+        "crumbs[0][url]=/",
+        "crumbs[1][name]=Shop+&+co",
+        "tiers[0][0]=1",
+        "tiers[0][1]=2",
+        "on=true",
+    ]
+
+
+def test_encode_pairs_later_duplicates_override():
+    assert encode_pairs({"a": 1, "a[0]": 2, "b": None, "c": False}) == ["a=1", "a%5B0%5D=2", "c=false"]
+    assert encode_pairs({"a[0]": 2, "a": [3]}) == ["a%5B0%5D=3"]
+    # Nested siblings with the same formatted key: the later one replaces the
+    # earlier before descending.
+    assert encode_pairs({"a": {1: {"x": 1}, "1": "leaf"}}) == ["a%5B1%5D=leaf"]
+    assert encode_pairs({"a": {"1": "leaf", 1: {"x": 1}}}) == ["a%5B1%5D%5Bx%5D=1"]
+    assert encode_pairs({"a": {True: {"x": 1}, "True": None}, "b": 1}) == ["b=1"]
+
+
+def test_encode_pairs_non_dict():
+    assert encode_pairs(None) == []
+    assert encode_pairs([1, 2]) == []
+
+
+def test_unquoted_values_match_quote_plus():
+    # `quote_plus` of the running Python decides, e.g. `~` is escaped on 3.6.
+    for char in "~-._aZ09 !*'()":
+        assert encode_pairs({"a": char}) == ["a=" + quote_plus(char)]
+
+
+def test_sorted_query():
+    data = {"title": "Hello world!", "__v": "1", "a": {"b": 1}, "_w": 100}
+    assert sorted_query(data) == "__v=1&_w=100&a%5Bb%5D=1&title=Hello+world%21"
+    assert sorted_query({}) == ""
+
+
+def test_decode_pairs_inverts_encode_pairs():
+    data = {
+        "crumbs": [{"name": "Home", "url": "/"}, {"name": "Shop & co"}],
+        "tiers": [["1", "2"]],
+        "seller": {"name": "Ñandú", "0": "zero"},
+        "on": "true",
+    }
+    assert decode_pairs("&".join(encode_pairs(data))) == data
+    assert decode_pairs("") == {}
+    assert decode_pairs("a=1&b[0]=x&b[1]=y&c") == {"a": "1", "b": ["x", "y"], "c": ""}
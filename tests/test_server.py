@@ -0,0 +1,51 @@
+from urllib.error import HTTPError
+from urllib.request import urlopen
+from zlib import decompress
+
+import pytest
+
+from flyyer import Flyyer, FlyyerMeta, FlyyerRender
+from flyyer.server import MockCDN, placeholder_png
+from flyyer.warm import warm
+
+KEY = "sg1j0HVy9bsMihJqa8Qwu8ZYgCYHG0tx"
+
+
+def test_placeholder_png():
+    png = placeholder_png(3, 2)
+    assert png.startswith(b"\x89PNG\r\n\x1a\n") and png.endswith(b"IEND\xaeB`\x82")
+    idat = png.index(b"IDAT")
+    length = int.from_bytes(png[idat - 4 : idat], "big")
+    assert decompress(png[idat + 4 : idat + 4 + length]) == b"\x00\xcc\xcc\xcc" * 2
+
+
+def test_mock_cdn_serves_and_validates_signed_urls():
+    signed = [
+        Flyyer(project="project", path=f"/{i}", secret=KEY, strategy=strategy, meta=FlyyerMeta(v="1"))
+        for i, strategy in enumerate(["HMAC", "JWT"])
+    ]
+    signed.append(FlyyerRender(tenant="t", deck="d", template="x", secret=KEY, strategy="HMAC", variables={"a": 1}))
+    signed.append(FlyyerRender(tenant="t", deck="d", template="x", secret=KEY, strategy="JWT"))
+    forged = signed[0].href().replace("/0", "/forged")
+    with MockCDN(secret=KEY, latency=0.001) as cdn:
+        with urlopen(cdn.url + signed[0].href().split("cdn.flyyer.io", 1)[1]) as response:
+            assert response.status == 200
+            assert response.headers["Content-Type"] == "image/png"
+            assert response.read() == cdn.image
+        with pytest.raises(HTTPError) as error:
+            urlopen(cdn.url + "/favicon.ico")
+        assert error.value.code == 404
+        report = warm(signed + [forged], base_url=cdn.url, concurrency=2, retries=0)
+        stats = cdn.stats()
+    assert report.as_dict()["statuses"] == {200: 4, 403: 1}
+    assert stats["requests"] == 7
+    assert stats["statuses"] == {200: 5, 404: 1, 403: 1}
+    assert stats["p50"] >= 0.001
+
+
+def test_mock_cdn_without_secret_only_checks_layout():
+    cdn = MockCDN()
+    assert cdn.status("/v2/project/_/__v=1/a") == 200
+    assert cdn.status("/v2/project/0123456789abcdef/__v=1/a") == 200
+    assert cdn.status("/render/v2/t/d/x?__v=1") == 200
+    assert cdn.status("/v3/project") == 404
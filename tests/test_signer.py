@@ -0,0 +1,159 @@
+from concurrent.futures import ThreadPoolExecutor
+from hashlib import sha256
+import hmac
+import pickle
+
+import jwt
+import pytest
+
+from flyyer import HMACSigner, JWTSigner, hmac_signer, jwt_signer
+from flyyer import signer
+
+
+KEY = "sg1j0HVy9bsMihJqa8Qwu8ZYgCYHG0tx"
+
+
+def test_hmac_signer_matches_hmac_new():
+    signer = HMACSigner(KEY)
+    for data in [b"", b"project/path__v=1", "ñandú".encode("utf-8") * 100]:
+        expected = hmac.new(KEY.encode("ASCII"), data, sha256).hexdigest()
+        assert signer.hexdigest(data) == expected
+        assert signer.sign(data) == expected[:16]
+
+
+def test_hmac_signer_is_cached_per_secret():
+    assert hmac_signer(KEY) is hmac_signer(KEY)
+    assert hmac_signer(KEY) is not hmac_signer(KEY + "x")
+
+
+def test_hmac_signer_shared_across_threads():
+    signer = hmac_signer(KEY)
+    messages = [str(i).encode("ASCII") for i in range(2000)]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(signer.sign, messages))
+    expected = [hmac.new(KEY.encode("ASCII"), m, sha256).hexdigest()[:16] for m in messages]
+    assert results == expected
+
+
+def test_jwt_signer_tokens_decode_with_pyjwt():
+    payloads = [
+        {},
+        {"path": "/", "params": {"i": None, "def": "/logo.png", "var": {"a": [1, True, None]}}},
+        {"d": "deck", "t": "template", "v": 4, "var": {"title": "Ñandú 🐦", "x": 1.5}},
+    ]
+    for payload in payloads:
+        token = JWTSigner(KEY).encode(payload)
+        assert jwt.decode(token, KEY, algorithms=["HS256"]) == payload
+        assert jwt.get_unverified_header(token) == {"typ": "JWT", "alg": "HS256"}
+        assert token.startswith("eyJ0eXAiOiJKV1QiLCJhbGciOiJIUzI1NiJ9.")
+        reference = jwt.encode(payload, KEY, algorithm="HS256")
+        if reference.startswith("eyJ0eXAiOiJKV1Qi"):  # older PyJWT releases order the header like this
+            assert token == reference
+
+
+def test_jwt_signer_fallback_to_pyjwt(monkeypatch):
+    calls = []
+    monkeypatch.setattr(jwt, "encode", lambda *args, **kwargs: calls.append(args) or "pyjwt")
+    assert JWTSigner(KEY, native=False).encode({"a": 1}) == "pyjwt"
+    assert JWTSigner(KEY).encode({"a": 1}) != "pyjwt"
+    monkeypatch.setattr(signer, "NATIVE_JWT", False)
+    assert JWTSigner(KEY).encode({"a": 1}) == "pyjwt"
+    assert len(calls) == 2
+
+
+def test_signers_verify():
+    assert HMACSigner(KEY).verify(b"data", HMACSigner(KEY).sign(b"data"))
+    assert not HMACSigner(KEY).verify(b"data", "0" * 16)
+    assert not HMACSigner(KEY).verify(b"data", "ñ")
+    signer = JWTSigner(KEY)
+    assert signer.verify(signer.encode({"a": 1}))
+    assert signer.verify(jwt.encode({"a": 1}, KEY, algorithm="HS256", headers={"kid": "1"}))
+    assert not signer.verify(jwt.encode({"a": 1}, KEY + "x", algorithm="HS256"))
+    assert not signer.verify(jwt.encode({"a": 1}, None, algorithm="none"))
+    assert not signer.verify("not-a-token")
+
+
+class CountingSigner:
+    def __init__(self, signer):
+        self.strategy = signer.strategy
+        self.signer = signer
+        self.calls = 0
+
+    def sign(self, data):
+        self.calls += 1
+        return self.signer.sign(data)
+
+
+@pytest.mark.parametrize("strategy", ["HMAC", "JWT"])
+def test_custom_signer_plugs_into_flyyer_and_render(strategy):
+    from flyyer import Flyyer, FlyyerRender, resolve_signer
+
+    custom = CountingSigner(resolve_signer(strategy, KEY))
+    meta = {"v": "1"}
+    flyyer = Flyyer(project="project", path="/a", variables={"a": 1}, meta=meta, strategy=custom)
+    expected = Flyyer(project="project", path="/a", variables={"a": 1}, meta=meta, strategy=strategy, secret=KEY)
+    assert flyyer.href() == expected.href()
+    assert flyyer.prepare().href() == expected.href()
+    render = FlyyerRender(tenant="t", deck="d", template="x", meta=meta, strategy=custom)
+    expected = FlyyerRender(tenant="t", deck="d", template="x", meta=meta, strategy=strategy, secret=KEY)
+    assert render.href() == expected.href()
+    assert render.prepare().href() == expected.href()
+    assert custom.calls == 4
+
+
+def test_resolve_signer_validates_once():
+    from flyyer import UnsignedSigner, resolve_signer
+
+    assert isinstance(resolve_signer(None, None), UnsignedSigner)
+    assert resolve_signer("hmac", KEY) is hmac_signer(KEY)
+    assert resolve_signer("JWT", KEY) is jwt_signer(KEY)
+    with pytest.raises(Exception, match="Signers must set `strategy`"):
+        resolve_signer(object(), None)
+    with pytest.raises(Exception, match="Invalid `strategy`"):
+        resolve_signer("RSA", KEY)
+    with pytest.raises(Exception, match="Missing `secret`"):
+        resolve_signer("HMAC", None)
+    with pytest.raises(Exception, match="Got `secret`"):
+        resolve_signer(None, KEY)
+
+
+@pytest.mark.parametrize("strategy", [None, "HMAC", "JWT"])
+def test_builders_with_signers_pickle(strategy):
+    from flyyer import Flyyer, FlyyerRender
+
+    secret = KEY if strategy else None
+    flyyer = Flyyer(project="project", path="/a", meta={"v": "1"}, secret=secret, strategy=strategy)
+    assert pickle.loads(pickle.dumps(flyyer)).href() == flyyer.href()
+    render = FlyyerRender(tenant="t", deck="d", template="x", meta={"v": "1"}, secret=secret, strategy=strategy)
+    assert pickle.loads(pickle.dumps(render)).href() == render.href()
+    assert pickle.loads(pickle.dumps(flyyer.signer)) is flyyer.signer
+
+
+def test_changing_strategy_or_secret_resolves_the_signer_again():
+    from flyyer import Flyyer, FlyyerRender
+
+    flyyer = Flyyer(project="project", path="/a", meta={"v": "1"})
+    flyyer.strategy = "HMAC"
+    flyyer.secret = KEY
+    assert flyyer.href() == Flyyer(project="project", path="/a", meta={"v": "1"}, strategy="HMAC", secret=KEY).href()
+    render = FlyyerRender(tenant="t", deck="d", template="x", meta={"v": "1"}, strategy="JWT", secret=KEY)
+    render.secret = None
+    with pytest.raises(Exception, match="Missing `secret`"):
+        render.href()
+    render.strategy = None
+    assert render.href() == FlyyerRender(tenant="t", deck="d", template="x", meta={"v": "1"}).href()
+
+
+def test_signer_instances_fingerprint_by_cache_key():
+    from flyyer import Flyyer, fingerprint
+
+    def page(strategy):
+        return Flyyer(project="project", path="/a", meta={"v": "1"}, strategy=strategy)
+
+    assert fingerprint(page(HMACSigner(KEY))) == fingerprint(page(HMACSigner(KEY)))
+    assert fingerprint(page(HMACSigner(KEY))) != fingerprint(page(HMACSigner("other")))
+    assert fingerprint(page(JWTSigner(KEY, native=True))) == fingerprint(page(JWTSigner(KEY)))
+    assert fingerprint(page(JWTSigner(KEY, native=False))) != fingerprint(page(JWTSigner(KEY)))
+    assert fingerprint(page(HMACSigner(KEY))) != fingerprint(page(JWTSigner(KEY)))
+    with pytest.raises(Exception, match="cache_key"):
+        fingerprint(page(CountingSigner(HMACSigner(KEY))))
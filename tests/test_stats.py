@@ -0,0 +1,65 @@
+import pytest
+
+from flyyer import Flyyer, FlyyerMeta, FlyyerRender, FlyyerStats, HrefCache
+from flyyer import flyyer as core, query
+
+KEY = "sg1j0HVy9bsMihJqa8Qwu8ZYgCYHG0tx"
+
+
+def test_stats_records_phases_and_restores():
+    original = query.encode_pairs
+    flyyer = Flyyer(project="project", path="/a", secret=KEY, strategy="HMAC", variables={"a": 1})
+    expected = flyyer.href()
+    with FlyyerStats() as stats:
+        assert query.encode_pairs is not original
+        assert flyyer.href() == expected
+        FlyyerRender(tenant="t", deck="d", template="x", secret=KEY, strategy="JWT").href()
+    assert query.encode_pairs is original
+    assert core.encode_pairs is original
+    phases = stats.as_dict()["phases"]
+    assert phases["href"]["count"] == 2
+    assert phases["assemble"]["count"] == 2
+    assert phases["sign"]["count"] == 2
+    assert phases["encode"]["count"] >= 2
+    assert phases["sort"]["count"] >= 1
+    assert phases["href"]["total"] >= phases["sign"]["total"]
+    assert 0 <= phases["href"]["p50"] <= phases["href"]["p99"] <= phases["href"]["max"]
+    flyyer.href()
+    assert stats.as_dict()["phases"]["href"]["count"] == 2
+
+
+def test_stats_nested_href_counted_once():
+    # Reserved keys make a prepared render fall back to `FlyyerRender.href()`.
+    prepared = FlyyerRender(tenant="t", deck="d", template="x").prepare()
+    with FlyyerStats() as stats:
+        prepared.with_variables({"_w": 100}).href()
+    assert stats.as_dict()["phases"]["href"]["count"] == 1
+
+
+def test_stats_hooks_and_cache():
+    seen = []
+    cache = HrefCache()
+    flyyer = Flyyer(project="project", meta=FlyyerMeta(v="1"))
+    stats = FlyyerStats()
+    stats.add_hook(lambda phase, seconds: seen.append(phase))
+    with stats:
+        cache.href(flyyer)
+        cache.href(flyyer)
+    assert stats.as_dict()["cache"] == {"hits": 1, "misses": 1}
+    assert seen.count("href") == 1
+    stats.reset()
+    assert stats.as_dict()["phases"]["href"]["count"] == 0
+
+
+def test_only_one_stats_enabled():
+    with FlyyerStats():
+        with pytest.raises(Exception):
+            FlyyerStats().enable()
+
+
+def test_percentile_nearest_rank():
+    from flyyer.stats import percentile
+
+    assert percentile([], 0.5) == 0.0
+    ordered = [float(i) for i in range(1, 101)]
+    assert (percentile(ordered, 0.5), percentile(ordered, 0.99), percentile(ordered, 1.0)) == (51.0, 100.0, 100.0)
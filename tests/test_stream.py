@@ -0,0 +1,65 @@
+from csv import reader
+from io import StringIO
+from json import loads
+
+import pytest
+
+from flyyer import Flyyer, FlyyerClock, FlyyerRender
+from flyyer.stream import iter_chunks, iter_hrefs, write_hrefs
+
+KEY = "sg1j0HVy9bsMihJqa8Qwu8ZYgCYHG0tx"
+CLOCK = FlyyerClock(now=lambda: 1618281823)
+
+
+def _records():
+    yield {"path": "/a", "variables": {"title": "A"}}
+    yield {"path": "/b", "meta": {"width": 10}}
+    yield {"key": "c", "path": "/c", "default": "/c.png"}
+    yield {}
+
+
+@pytest.mark.parametrize("strategy", [None, "HMAC", "JWT"])
+def test_iter_hrefs_matches_href(strategy):
+    options = dict(secret=KEY if strategy else None, strategy=strategy, clock=CLOCK, meta={"id": "x"})
+    base = Flyyer(project="project", path="/home", variables={"site": "Shop"}, **options)
+    expected = [
+        ("/a", Flyyer(project="project", path="/a", variables={"site": "Shop", "title": "A"}, **options).href()),
+        ("/b", Flyyer(project="project", path="/b", variables={"site": "Shop"}, **{**options, "meta": {"id": "x", "width": 10}}).href()),
+        ("c", Flyyer(project="project", path="/c", variables={"site": "Shop"}, default="/c.png", **options).href()),
+        ("/home", base.href()),
+    ]
+    pairs = iter_hrefs(base, _records())
+    assert next(pairs) == expected[0]
+    assert list(pairs) == expected[1:]
+    assert list(iter_hrefs(base, _records(), offset=2)) == expected[2:]
+
+
+def test_iter_hrefs_render_keys():
+    base = FlyyerRender(tenant="t", deck="d", template="x", secret=KEY, strategy="HMAC", clock=CLOCK)
+    records = [{"variables": {"title": "A"}}, {"meta": {"width": 5}}]
+    pairs = list(iter_hrefs(base, records, offset=0))
+    assert pairs[0] == (0, FlyyerRender(tenant="t", deck="d", template="x", variables={"title": "A"}, secret=KEY, strategy="HMAC", clock=CLOCK).href())
+    assert pairs[1][0] == 1 and "_w=5" in pairs[1][1]
+    assert [name for name, _ in iter_hrefs(base, records, key=lambda record: len(record))] == [1, 1]
+
+
+def test_write_hrefs_sinks():
+    pairs = [("/a", "https://cdn.flyyer.io/v2/p/_/__v=1&a=1/a"), ("/b", "https://cdn.flyyer.io/v2/p/_/__v=1/b")]
+    output = StringIO()
+    assert write_hrefs(iter(pairs), output) == 2
+    assert [loads(line) for line in output.getvalue().splitlines()] == [{"key": k, "href": h} for k, h in pairs]
+    output = StringIO()
+    write_hrefs(pairs, output, format="csv")
+    assert list(reader(StringIO(output.getvalue()))) == [["key", "href"]] + [list(pair) for pair in pairs]
+    output = StringIO()
+    write_hrefs(pairs, output, format="sitemap", site_url="https://shop.com/")
+    sitemap = output.getvalue()
+    assert sitemap.startswith('<?xml version="1.0" encoding="UTF-8"?>')
+    assert "<loc>https://shop.com/a</loc><image:image><image:loc>https://cdn.flyyer.io/v2/p/_/__v=1&amp;a=1/a</image:loc>" in sitemap
+    assert sitemap.endswith("</urlset>\n")
+    with pytest.raises(Exception, match="Invalid `format`"):
+        write_hrefs(pairs, output, format="xml")
+
+
+def test_iter_chunks():
+    assert list(iter_chunks(range(5), 2)) == [[0, 1], [2, 3], [4]]
@@ -0,0 +1,54 @@
+from html import escape
+
+import pytest
+
+from flyyer import Flyyer, FlyyerClock, FlyyerMetaTags, meta_tags
+
+KEY = "sg1j0HVy9bsMihJqa8Qwu8ZYgCYHG0tx"
+PRESETS = [
+    ("property", "og:image", {"width": 1200, "height": 630}),
+    ("name", "twitter:image", {"agent": "twitter", "width": None}),
+    ("property", "og:image:secure_url", {"resolution": 0.5}),
+]
+
+
+@pytest.mark.parametrize("strategy", [None, "HMAC", "JWT"])
+def test_meta_tags_match_href(strategy):
+    options = dict(
+        project="project",
+        path="/products/1",
+        secret=KEY if strategy else None,
+        strategy=strategy,
+        variables={"title": "Jeans & shirts", "_h": 10},
+        meta={"width": 100, "id": "jeans"},
+        default="/default.png",
+        clock=FlyyerClock(now=lambda: 1618281823),
+    )
+    tags = FlyyerMetaTags(Flyyer(**options), presets=PRESETS)
+    for (attribute, name, preset), (_, _, href, _) in zip(PRESETS, tags.hrefs()):
+        assert href == Flyyer(**{**options, "meta": {**options["meta"], **preset}}).href()
+    block = tags.render().split("\n")
+    assert block[0] == f'<meta property="og:image" content="{escape(tags.hrefs()[0][2])}">'
+    assert block[1:3] == [
+        '<meta property="og:image:width" content="1200">',
+        '<meta property="og:image:height" content="630">',
+    ]
+    assert block[3].startswith('<meta name="twitter:image" content="https://cdn.flyyer.io/v2/project/')
+    assert block[-1] == '<meta name="twitter:card" content="summary_large_image">'
+
+
+def test_meta_tags_are_memoized_per_context():
+    now = [1618281823]
+    flyyer = Flyyer(project="project", clock=FlyyerClock(now=lambda: now[0]))
+    with FlyyerMetaTags(flyyer) as tags:
+        block = str(tags)
+        now[0] += 10
+        assert tags.render() is block
+        assert tags.__html__() is block
+    assert tags.render() != block
+    assert meta_tags(flyyer, card=None).count("<meta") == 2
+
+
+def test_meta_tags_reject_unknown_preset_fields():
+    with pytest.raises(Exception, match="Invalid preset `og:image`"):
+        FlyyerMetaTags(Flyyer(project="project"), presets=[("property", "og:image", {"v": "1"})])
@@ -0,0 +1,121 @@
+import pytest
+
+from flyyer import (
+    Flyyer,
+    FlyyerClock,
+    FlyyerRender,
+    FlyyerRenderTemplate,
+    FlyyerTemplate,
+    LayeredFlyyer,
+    compile_template,
+)
+
+KEY = "sg1j0HVy9bsMihJqa8Qwu8ZYgCYHG0tx"
+CLOCK = FlyyerClock(now=lambda: 1618281823)
+VARIABLES = {"title": "Default", "description": "Jeans & shirts", "items": [{"a": 1}, "b"]}
+
+
+@pytest.mark.parametrize("strategy", [None, "HMAC", "JWT"])
+def test_flyyer_template_matches_href(strategy):
+    options = dict(
+        project="project",
+        path="/products/1",
+        secret=KEY if strategy else None,
+        strategy=strategy,
+        meta={"width": 100, "id": "jeans"},
+        default="/default.png",
+        clock=CLOCK,
+    )
+    template = FlyyerTemplate(Flyyer(variables=VARIABLES, **options), ["title", "price"])
+    for values in [{}, {"title": "Hello world!"}, {"price": 19.99, "title": None}, {"price": [1, {"z": 2}]}]:
+        expected = Flyyer(variables={**VARIABLES, **values}, **options).href()
+        assert template.href(values) == expected
+        assert template(**values) == expected
+    expected = Flyyer(**{**options, "path": "/products/2"}, variables={**VARIABLES, "price": 1}).href()
+    assert template.href({"price": 1}, path="products/2") == expected
+
+
+@pytest.mark.parametrize("strategy", [None, "HMAC", "JWT"])
+def test_render_template_matches_href(strategy):
+    options = dict(
+        tenant="tenant",
+        deck="deck",
+        template="template",
+        version="4",
+        secret=KEY if strategy else None,
+        strategy=strategy,
+        meta={"width": 100, "agent": "bot"},
+        clock=CLOCK,
+    )
+    template = compile_template(FlyyerRender(variables=VARIABLES, **options), ["price", "title"])
+    assert isinstance(template, FlyyerRenderTemplate)
+    for values in [{}, {"title": "Hello world!"}, {"price": 19.99, "title": None}, {"price": 3, "title": "a"}]:
+        expected = FlyyerRender(variables={**VARIABLES, **values}, **options).href()
+        assert template.href(values) == expected
+
+
+def test_template_slot_defaults_to_meta():
+    flyyer = Flyyer(project="project", meta={"width": 100}, default="/a.png", clock=CLOCK)
+    template = FlyyerTemplate(flyyer, ["_w", "_def"])
+    assert template.href() == flyyer.href()
+    expected = Flyyer(project="project", meta={"width": 100}, variables={"_w": 5}, default="/a.png", clock=CLOCK)
+    assert template.href({"_w": 5}) == expected.href()
+
+
+def test_template_pinned_v_variable():
+    flyyer = Flyyer(project="project", variables={"__v": "2"}, secret=KEY, strategy="HMAC")
+    template = FlyyerTemplate(flyyer, ["title"])
+    expected = Flyyer(project="project", variables={"__v": "2", "title": "a"}, secret=KEY, strategy="HMAC")
+    assert template.href({"title": "a"}) == expected.href()
+
+
+def test_template_rejects_unknown_and_reserved_slots():
+    template = FlyyerTemplate(Flyyer(project="project"), ["title"])
+    with pytest.raises(Exception, match="Unknown slots `price`"):
+        template.href({"price": 1})
+    with pytest.raises(Exception, match="reserved"):
+        FlyyerTemplate(Flyyer(project="project"), ["__v"])
+    with pytest.raises(Exception, match="reserved"):
+        FlyyerRenderTemplate(FlyyerRender(tenant="t", deck="d", template="x"), ["_w"])
+    with pytest.raises(Exception, match="Invalid `obj`"):
+        compile_template("https://cdn.flyyer.io/v2/project/_/__v=1/", ["title"])
+
+
+@pytest.mark.parametrize("strategy", [None, "HMAC", "JWT"])
+def test_layered_flyyer_matches_href(strategy):
+    options = dict(
+        project="project",
+        secret=KEY if strategy else None,
+        strategy=strategy,
+        meta={"width": 100},
+        default="/default.png",
+        clock=CLOCK,
+    )
+    layered = LayeredFlyyer(Flyyer(variables=VARIABLES, **options))
+    pages = [
+        ("/a", {}),
+        ("/b", {"title": "Shadowed", "price": 3}),
+        ("/c", {"items": None, "_w": 5, "_def": "/other.png"}),
+        ("/d", {"__v": "pinned", "items": {"x": [1]}}),
+    ]
+    expected = [Flyyer(path=path, variables={**VARIABLES, **overrides}, **options).href() for path, overrides in pages]
+    assert layered.href_many(pages) == expected
+
+
+@pytest.mark.parametrize("strategy", [None, "HMAC"])
+def test_bracketed_keys_shadow_like_href(strategy):
+    options = dict(project="project", path="/a", secret=KEY if strategy else None, strategy=strategy, clock=CLOCK)
+    cases = [
+        ({"a": {"b": 1}}, {"a[b]": 2}),
+        ({"a[b]": 1}, {"a": {"b": 2}}),
+        ({"a": {"b": 1}, "a[b]": 3}, {"a": {"b": 2}}),
+    ]
+    for base, overrides in cases:
+        expected = Flyyer(variables={**base, **overrides}, **options).href()
+        assert LayeredFlyyer(Flyyer(variables=base, **options)).href(overrides) == expected
+        template = FlyyerTemplate(Flyyer(variables=base, **options), list(overrides))
+        assert template.href(overrides) == expected
+        render_options = dict(tenant="t", deck="d", template="x", secret=options["secret"], strategy=strategy, clock=CLOCK)
+        expected = FlyyerRender(variables={**base, **overrides}, **render_options).href()
+        template = FlyyerRenderTemplate(FlyyerRender(variables=base, **render_options), list(overrides))
+        assert template.href(overrides) == expected
@@ -0,0 +1,60 @@
+from json import load
+from os import path
+
+import pytest
+
+from flyyer import to_query
+from flyyer.testing import build, check_golden, generate_corpus, run_differential, shrink
+
+CORPUS = path.join(path.dirname(path.abspath(__file__)), "golden_corpus.json")
+
+
+def test_golden_corpus():
+    with open(CORPUS, encoding="utf-8") as f:
+        entries = load(f)
+    assert len(entries) == 200
+    assert check_golden(entries) == []
+
+
+def test_prepared_paths_match_corpus():
+    for case in generate_corpus(seed=1, count=300):
+        obj = build(case)
+        try:
+            expected = obj.href()
+        except UnicodeEncodeError:
+            continue
+        assert obj.prepare().href() == expected, case
+
+
+def test_run_differential_equal_implementations():
+    report = run_differential(lambda variables: "&".join([to_query(variables)]), target="to_query", count=200)
+    assert report.ok
+    assert report.cases == 200
+    assert report.reference_rate > 0 and report.candidate_rate > 0
+
+
+def test_run_differential_shrinks_mismatches():
+    def broken(variables):
+        # Mishandles booleans nested in lists.
+        query = to_query(variables)
+        return query.replace("%5D=true", "%5D=True")
+
+    report = run_differential(broken, target="to_query", count=500, max_mismatches=3, repeat=0)
+    assert not report.ok and len(report.mismatches) == 3
+    for mismatch in report.mismatches:
+        variables = mismatch.shrunk["args"]["variables"]
+        assert to_query(variables) != broken(variables)
+        assert len(to_query(variables).split("&")) == 1
+
+
+def test_shrink_stops_at_minimal_case():
+    args = {"project": "p", "path": "/x", "variables": {"a": [1, {"b": "xyz"}], "c": "d"}, "meta": {"v": "1"}}
+    case = {"kind": "flyyer", "args": {**args, "strategy": None, "secret": None}}
+    shrunk = shrink(case, lambda case: "b" in str(case["args"]["variables"]))
+    assert shrunk["args"]["variables"] == {"a": [{"b": ""}]}
+    assert shrunk["args"]["meta"] == {} and shrunk["args"]["path"] == "/"
+
+
+def test_run_differential_rejects_unknown_target():
+    with pytest.raises(Exception, match="Invalid `target`"):
+        run_differential(to_query, target="nope")
@@ -0,0 +1,83 @@
+from io import StringIO
+
+from flyyer import Flyyer, FlyyerMeta, FlyyerRender, FlyyerVerifier, verify_href
+from flyyer.verify import count_forged
+
+KEY = "sg1j0HVy9bsMihJqa8Qwu8ZYgCYHG0tx"
+OTHER = "sg1j0HVy9bsMihJqa8Qwu8ZYgCYHG0ty"
+
+
+def _flyyers(strategy, secret):
+    return [
+        Flyyer(project="project", path="/", secret=secret, strategy=strategy),
+        Flyyer(
+            project="project",
+            path="/collections/col?sort=price",
+            secret=secret,
+            strategy=strategy,
+            variables={"title": "Hello world!", "tags": ["a/b", "c"], "_w": None},
+            meta=FlyyerMeta(id="dev forgot to slugify", width=100),
+            default="/logo.png",
+        ),
+        Flyyer(project="project", path="a", secret=secret, strategy=strategy, variables={"__v": "pinned"}),
+    ]
+
+
+def _renders(strategy, secret):
+    return [
+        FlyyerRender(tenant="t", deck="d", template="x", secret=secret, strategy=strategy),
+        FlyyerRender(tenant="t", deck="d", template="x", extension="png", secret=secret, strategy=strategy),
+        FlyyerRender(tenant="t", deck="d", template="x", version="3", secret=secret, strategy=strategy),
+        FlyyerRender(
+            tenant="t",
+            deck="d",
+            template="x",
+            version="3",
+            extension="jpeg",
+            variables={"title": "Ñandú & co", "items": [{"a": 1}]},
+            meta=FlyyerMeta(agent="whatsapp"),
+            secret=secret,
+            strategy=strategy,
+        ),
+    ]
+
+
+def test_verify_signed_hrefs():
+    verifier = FlyyerVerifier(KEY)
+    for strategy in ["HMAC", "JWT"]:
+        for flyyer in _flyyers(strategy, KEY) + _renders(strategy, KEY):
+            href = flyyer.href()
+            assert verifier.verify(href), href
+            assert not FlyyerVerifier(OTHER).verify(href), href
+            assert verify_href(href, KEY)
+
+
+def test_verify_rejects_forged_and_unsigned():
+    verifier = FlyyerVerifier(KEY)
+    hmac = _flyyers("HMAC", KEY)[1].href()
+    assert not verifier.verify(hmac.replace("title=Hello", "title=Hellx"))
+    assert not verifier.verify(hmac.replace("/collections/", "/collection/"))
+    jwt = _flyyers("JWT", KEY)[1].href()
+    assert not verifier.verify(jwt.replace("jwt-eyJ", "jwt-eyK"))
+    render = _renders("HMAC", KEY)[3].href()
+    assert not verifier.verify(render.replace("/d/x.", "/d/y."))
+    assert not verifier.verify(render.replace("x.3.jpeg", "x.4.jpeg"))
+    for flyyer in _flyyers(None, None) + _renders(None, None):
+        assert not verifier.verify(flyyer.href())
+    assert not verifier.verify("https://cdn.flyyer.io/v2/project/jwt-ñ?__v=1")
+    assert not verifier.verify("https://example.com/")
+
+
+def test_verify_lines_streams_access_log():
+    good = _flyyers("HMAC", KEY)[1].href()
+    path = good[len("https://cdn.flyyer.io") :]
+    log = StringIO(
+        f'127.0.0.1 - - [17/Oct/2026:10:00:00] "GET {path} HTTP/1.1" 200 123\n'
+        "127.0.0.1 - - [17/Oct/2026:10:00:01] \"GET /favicon.ico HTTP/1.1\" 404 0\n"
+        f"{good.replace('title=Hello', 'title=Bye')}\n"
+    )
+    results = list(FlyyerVerifier(KEY).verify_lines(log))
+    assert [ok for _, ok in results] == [True, False]
+    assert results[0][0] == path
+    log.seek(0)
+    assert count_forged(log, KEY) == (1, 1)
@@ -0,0 +1,129 @@
+import asyncio
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from threading import Thread
+import pytest
+
+from flyyer import Flyyer, FlyyerMeta
+from flyyer.warm import CDNWarmer, warm
+
+
+class _Server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    seen = []
+    failures = {}
+
+    def _respond(self, body):
+        self.seen.append((self.command, self.path, self.headers["Host"]))
+        status = 200
+        if self.failures.get(self.path, 0) > 0:
+            self.failures[self.path] -= 1
+            status = 503
+        self.send_response(status)
+        self.send_header("Content-Type", "image/png")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command == "GET":
+            self.wfile.write(body)
+
+    def do_GET(self):
+        self._respond(b"x" * 100)
+
+    def do_HEAD(self):
+        self._respond(b"x" * 100)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    _Handler.seen = []
+    _Handler.failures = {}
+    httpd = _Server(("127.0.0.1", 0), _Handler)
+    thread = Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_warm_flyyer_objects_against_local_server(server):
+    pages = [
+        Flyyer(project="project", path=f"/products/{i}", meta=FlyyerMeta(v="1")) for i in range(20)
+    ]
+    report = warm(pages, base_url=server, concurrency=4, method="GET")
+    stats = report.as_dict()
+    assert stats["requests"] == 20
+    assert stats["statuses"] == {200: 20}
+    assert stats["errors"] == 0
+    assert 0 < stats["p50"] <= stats["max"]
+    paths = sorted(path for _, path, _ in _Handler.seen)
+    assert paths == sorted("/v2/project/_/__v=1/products/" + str(i) for i in range(20))
+
+
+def test_warm_retries_with_backoff(server):
+    href = "https://cdn.flyyer.io/v2/project/_/__v=1/"
+    _Handler.failures["/v2/project/_/__v=1/"] = 2
+    report = warm([href], base_url=server, retries=2, backoff=0.01)
+    assert report.retries == 2
+    assert dict(report.statuses) == {200: 1}
+    assert [command for command, _, _ in _Handler.seen] == ["HEAD"] * 3
+
+
+def test_warm_reports_errors_when_unreachable():
+    report = warm(["http://127.0.0.1:1/"], retries=1, backoff=0.01)
+    assert report.errors == 1
+    assert report.retries == 1
+
+
+def test_warm_times_out_connecting(monkeypatch):
+    async def hang(*args, **kwargs):
+        await asyncio.sleep(60)
+
+    monkeypatch.setattr(asyncio, "open_connection", hang)
+    report = warm(["http://10.255.255.1/"], retries=0, timeout=0.05)
+    assert (report.requests, report.errors) == (1, 1)
+    assert report.latencies[0] < 5
+
+
+def test_warm_rate_limit_per_host(server):
+    warmer = CDNWarmer(base_url=server, concurrency=8, rate_limit=50)
+    hrefs = [f"{server}/{i}" for i in range(10)]
+    loop = asyncio.new_event_loop()
+    try:
+        report = loop.run_until_complete(warmer.warm(hrefs))
+    finally:
+        loop.close()
+    assert report.requests == 10
+    assert report.elapsed >= 9 / 50
+
+
+class _BadPage:
+    def href(self):
+        raise ValueError("missing slug")
+
+
+def test_warm_counts_bad_pages_and_responses_as_errors(server):
+    import socket
+
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(1)
+
+    def oversized_header():
+        connection, _ = listener.accept()
+        connection.recv(65536)
+        connection.sendall(b"HTTP/1.1 200 OK\r\nX-Big: " + b"a" * 200000 + b"\r\n\r\n")
+        connection.close()
+
+    Thread(target=oversized_header, daemon=True).start()
+    bad_host = f"http://127.0.0.1:{listener.getsockname()[1]}/"
+    report = warm([_BadPage(), bad_host, f"{server}/ok"], retries=0, concurrency=1)
+    listener.close()
+    assert report.errors == 2
+    assert dict(report.statuses) == {200: 1}
@@ -0,0 +1,57 @@
+from multiprocessing import get_context
+import pickle
+
+import pytest
+
+from flyyer import Flyyer, FlyyerClock, FlyyerRender
+from flyyer.workers import href_many, href_page, href_render, install, installed
+
+KEY = "sg1j0HVy9bsMihJqa8Qwu8ZYgCYHG0tx"
+
+
+@pytest.mark.parametrize("strategy", [None, "HMAC", "JWT"])
+def test_prepared_builders_pickle_as_config(strategy):
+    options = dict(secret=KEY if strategy else None, strategy=strategy, meta={"v": "1", "width": 10})
+    prepared = Flyyer(project="project", path="/a", variables={"title": "A"}, default="/d.png", **options).prepare()
+    data = pickle.dumps(prepared)
+    first, second = pickle.loads(data), pickle.loads(data)
+    assert first.href() == prepared.href()
+    assert first._state is second._state
+    render = FlyyerRender(tenant="t", deck="d", template="x", clock=FlyyerClock(bucket=60), **options).prepare()
+    copy = pickle.loads(pickle.dumps(render))
+    assert copy.href() == render.href()
+    assert (copy.strategy, copy.clock.bucket) == (render.strategy, 60)
+    # Flyyer objects keep pickling: signers are rebuilt from their secret.
+    flyyer = Flyyer(project="project", **options)
+    assert pickle.loads(pickle.dumps(flyyer)).href() == flyyer.href()
+
+
+
+def test_prepared_states_are_cached_by_type():
+    # `1200 == 1200.0`, but they are different `_w` values.
+    for meta in ({"v": "1", "width": 1200}, {"v": "1", "width": 1200.0}):
+        prepared = Flyyer(project="p", meta=meta).prepare()
+        assert pickle.loads(pickle.dumps(prepared)).href() == prepared.href()
+    for version in (1, 1.0):
+        render = FlyyerRender(tenant="t", deck="d", template="x", version=version, meta={"v": "1"}).prepare()
+        assert pickle.loads(pickle.dumps(render)).href() == render.href()
+
+def test_install_and_tasks_in_process():
+    flyyer = Flyyer(project="project", secret=KEY, strategy="HMAC", meta={"v": "1"})
+    install(flyyer)
+    install(FlyyerRender(tenant="t", deck="d", template="x", meta={"v": "1"}), name="render")
+    assert href_page("a", {"title": "A"}) == Flyyer(project="project", path="/a", variables={"title": "A"}, secret=KEY, strategy="HMAC", meta={"v": "1"}).href()
+    assert href_many([("/b", None)]) == flyyer.href_many([("/b", None)])
+    assert href_render({"a": 1}, name="render") == "https://cdn.flyyer.io/render/v2/t/d/x?__v=1&a=1"
+    assert href_many([{"a": 1}], name="render") == [href_render({"a": 1}, name="render")]
+    with pytest.raises(Exception, match="Missing builder `nope`"):
+        installed("nope")
+
+
+def test_install_in_worker_initializer():
+    flyyer = Flyyer(project="project", secret=KEY, strategy="HMAC", meta={"v": "1"})
+    pages = [(f"/{i}", {"title": f"Page {i}"}) for i in range(4)]
+    # `multiprocessing.Pool`: `ProcessPoolExecutor` only takes an initializer since Python 3.7.
+    with get_context("spawn").Pool(1, initializer=install, initargs=(flyyer.prepare(),)) as pool:
+        chunks = pool.map(href_many, [pages[:2], pages[2:]])
+    assert chunks[0] + chunks[1] == flyyer.href_many(pages)